@@ -0,0 +1,92 @@
+# benchmarks/bench_backends.py
+# Run from chapter-06-rag:  python -m benchmarks.bench_backends --docs 5000
+import argparse
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from src.infrastructure.chroma_store import ChromaVectorStore
+from src.infrastructure.numpy_store import NumpyVectorStore
+from src.infrastructure.quantized_store import QuantizedVectorStore
+from benchmarks.bench_bulk_ingest import make_documents
+from benchmarks.bench_search_many import QUESTIONS
+
+def _percentiles(samples):
+    ordered = sorted(samples)
+    return {
+        "p50_ms": 1000 * statistics.median(ordered),
+        "p95_ms": 1000 * ordered[int(0.95 * (len(ordered) - 1))],
+    }
+
+def check_interface_calls(stores, query: str, limit: int):
+    """Calls search/search_many positionally, in the order VectorStoreInterface declares."""
+    scope = {"chunk_index": {"$lt": 10}}
+    for name, store in stores:
+        single = store.search(query, limit, scope)
+        many = store.search_many([query], limit, scope)
+        assert single and all(doc.metadata["chunk_index"] < 10 for doc in single), name
+        assert [doc.doc_id for doc in single] == [doc.doc_id for doc in many[0]], name
+
+def run_benchmark(doc_count: int, query_count: int, limit: int, batch_size: int):
+    documents = make_documents(doc_count)
+    queries = [f"{QUESTIONS[i % len(QUESTIONS)]} ({i})" for i in range(query_count)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chroma = ChromaVectorStore(collection_name="bench_chroma", persist_path=tmp, result_cache_size=0)
+        numpy_store = NumpyVectorStore(collection_name="bench_numpy", persist_path=tmp,
+                                       embedding_function=chroma.embedding_function)
+
+        # Pre-embed the queries once so "index only" latency excludes the embedding model
+        query_vectors = np.asarray(chroma.embedding_function(queries), dtype=np.float32)
+        query_vectors /= np.maximum(np.linalg.norm(query_vectors, axis=1, keepdims=True), 1e-12)
+
+        rows = []
+        for name, store in (("chroma", chroma), ("numpy", numpy_store)):
+            start = time.perf_counter()
+            for i in range(0, doc_count, batch_size):
+                store.add_documents(documents[i:i + batch_size])
+            ingest_elapsed = time.perf_counter() - start
+
+            end_to_end = []
+            for query in queries:
+                start = time.perf_counter()
+                store.search(query, limit=limit)
+                end_to_end.append(time.perf_counter() - start)
+
+            index_only = []
+            for vector in query_vectors:
+                start = time.perf_counter()
+                if name == "chroma":
+                    store.collection.query(query_embeddings=[vector], n_results=limit)
+                else:
+                    store.search_by_vectors(vector[None, :], limit=limit)
+                index_only.append(time.perf_counter() - start)
+
+            rows.append((name, doc_count / ingest_elapsed, _percentiles(end_to_end), _percentiles(index_only)))
+
+        check_interface_calls([("chroma", chroma), ("numpy", numpy_store),
+                               ("quantized", QuantizedVectorStore(numpy_store))], queries[0], limit)
+
+        start = time.perf_counter()
+        NumpyVectorStore(collection_name="bench_numpy", persist_path=tmp,
+                         embedding_function=chroma.embedding_function)
+        reopen_ms = 1000 * (time.perf_counter() - start)
+
+    print(f"Corpus: {doc_count} docs | queries={query_count} | limit={limit}")
+    print(f"{'backend':<8} {'ingest docs/s':>14} {'e2e p50':>9} {'e2e p95':>9} {'index p50':>10} {'index p95':>10}")
+    for name, ingest_rate, e2e, index in rows:
+        print(f"{name:<8} {ingest_rate:14.1f} {e2e['p50_ms']:8.2f}ms {e2e['p95_ms']:8.2f}ms "
+              f"{index['p50_ms']:9.3f}ms {index['p95_ms']:9.3f}ms")
+    print(f"NumpyVectorStore re-open (mmap): {reopen_ms:.1f}ms")
+    print("search/search_many(query, limit, filters) called positionally: filter applied on every backend")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest and query latency: NumpyVectorStore vs ChromaVectorStore.")
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+    run_benchmark(args.docs, args.queries, args.limit, args.batch_size)
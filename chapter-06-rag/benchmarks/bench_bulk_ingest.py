@@ -0,0 +1,58 @@
+# benchmarks/bench_bulk_ingest.py
+# Run from chapter-06-rag:  python -m benchmarks.bench_bulk_ingest --docs 2000
+import argparse
+import tempfile
+import time
+
+from src.infrastructure.chroma_store import ChromaVectorStore
+from src.interfaces import IngestionDocument
+
+SENTENCES = [
+    "Drivers must take a mandatory 45-minute break for every 4.5 hours of driving.",
+    "In urban areas, the maximum speed limit is 30 km/h regardless of signage.",
+    "Any defects must be reported via the app before the vehicle is moved.",
+    "Press the Red Panic Button on the dashboard to alert the Command Center.",
+    "Shipment LS-2026-X contains fragile glassware and requires full coverage.",
+]
+
+def make_documents(count: int):
+    """Synthetic policy-like chunks, each one slightly different."""
+    return [
+        IngestionDocument(
+            content=f"{SENTENCES[i % len(SENTENCES)]} Reference {i}.",
+            metadata={"source": "bench", "chunk_index": i},
+            doc_id=f"bench_{i}"
+        )
+        for i in range(count)
+    ]
+
+def run_benchmark(doc_count: int, batch_size: int, max_workers: int):
+    documents = make_documents(doc_count)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ChromaVectorStore(collection_name="bench_single", persist_path=tmp)
+        start = time.perf_counter()
+        if not store.add_documents(documents):
+            raise RuntimeError("add_documents failed; no throughput to report")
+        single_elapsed = time.perf_counter() - start
+
+        store = ChromaVectorStore(collection_name="bench_bulk", persist_path=tmp)
+        report = store.add_documents_bulk(documents, batch_size=batch_size, max_workers=max_workers)
+
+    # A failed batch is not counted as stored, so docs/sec would describe a different run
+    if not report.success:
+        for failure in report.failed_batches:
+            print(f"Failed batch {failure.batch_index} ({len(failure.doc_ids)} docs): {failure.error}")
+        raise RuntimeError(f"add_documents_bulk stored {report.stored_documents}/{report.total_documents} documents")
+
+    print(f"Documents: {doc_count} | batch_size={batch_size} | workers={max_workers}")
+    print(f"add_documents (single upsert): {doc_count / single_elapsed:8.1f} docs/sec")
+    print(f"add_documents_bulk           : {report.docs_per_second:8.1f} docs/sec")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput of bulk ingestion with the default local embedding function.")
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=128)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    run_benchmark(args.docs, args.batch_size, args.workers)
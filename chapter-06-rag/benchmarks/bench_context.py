@@ -0,0 +1,54 @@
+# benchmarks/bench_context.py
+# Run from chapter-06-rag:  python -m benchmarks.bench_context --limit 6
+import argparse
+import tempfile
+import time
+
+from src.infrastructure.chroma_store import ChromaVectorStore
+from src.interfaces import IngestionDocument
+from src.services.chunking import count_tokens
+from src.services.context_assembly import ContextAssembler
+from src.services.text_ingestion import TextIngestionService
+from benchmarks.bench_search_many import QUESTIONS
+
+def run_benchmark(limit: int, chunk_size: int, chunk_overlap: int, token_budget: int):
+    with open("data/sample_policy.txt", "r", encoding="utf-8") as f:
+        policy = f.read()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ChromaVectorStore(collection_name="bench_context", persist_path=tmp)
+        TextIngestionService(store, chunk_size=chunk_size, chunk_overlap=chunk_overlap).ingest_text(
+            policy, {"source": "policy_v1"}
+        )
+        assembler = ContextAssembler(token_budget=token_budget)
+
+        print(f"limit={limit} | chunk_size={chunk_size} | overlap={chunk_overlap} | budget={token_budget}")
+        print(f"{'question':<42} {'raw':>6} {'sent':>6} {'saved':>6} {'merged':>7} {'dupes':>6} {'ms':>6}")
+        total_raw = total_sent = 0
+        for question in QUESTIONS:
+            docs = store.search(question, limit=limit)
+            start = time.perf_counter()
+            assembled = assembler.assemble(question, docs)
+            elapsed_ms = 1000 * (time.perf_counter() - start)
+            raw = count_tokens("\n\n".join(doc.content for doc in docs))
+            total_raw += raw
+            total_sent += assembled.context_tokens
+            print(f"{question[:42]:<42} {raw:6d} {assembled.context_tokens:6d} {assembled.tokens_saved:6d} "
+                  f"{assembled.merged_chunks:7d} {assembled.dropped_duplicates:6d} {elapsed_ms:6.2f}")
+
+        # Stores can return None metadata; such a document is kept as its own, unmerged passage
+        bare = IngestionDocument(content="Loading docks close at 22:00 on public holidays.", metadata=None, doc_id="bare")
+        assembled = ContextAssembler(token_budget=4096).assemble(QUESTIONS[-1], docs + [bare])
+        assert [doc.doc_id for doc in assembled.documents].count("bare") == 1
+
+    saved = 100 * (1 - total_sent / total_raw) if total_raw else 0.0
+    print(f"Total prompt context: {total_raw} -> {total_sent} tokens ({saved:.1f}% saved)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prompt tokens before and after context assembly.")
+    parser.add_argument("--limit", type=int, default=6)
+    parser.add_argument("--chunk-size", type=int, default=50)
+    parser.add_argument("--chunk-overlap", type=int, default=10)
+    parser.add_argument("--budget", type=int, default=512)
+    args = parser.parse_args()
+    run_benchmark(args.limit, args.chunk_size, args.chunk_overlap, args.budget)
@@ -0,0 +1,54 @@
+# benchmarks/bench_filters.py
+# Run from chapter-06-rag:  python -m benchmarks.bench_filters
+import argparse
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from src.interfaces import IngestionDocument
+from src.infrastructure.numpy_store import NumpyVectorStore
+from benchmarks.bench_quantized import LookupEmbedding, make_vectors
+
+def run_benchmark(sizes, docs_per_case: int, dim: int, query_count: int, limit: int):
+    print(f"docs/case={docs_per_case} | dim={dim} | queries={query_count} | limit={limit}")
+    print(f"{'collection':>10} {'unfiltered p50':>15} {'case-scoped p50':>16}")
+    for size in sizes:
+        data = make_vectors(size, dim, clusters=32)
+        with tempfile.TemporaryDirectory() as tmp:
+            store = NumpyVectorStore("bench_filters", persist_path=tmp, embedding_function=LookupEmbedding(data))
+            for start in range(0, size, 10000):
+                store.add_documents([
+                    IngestionDocument(
+                        content=f"vec:{i}",
+                        metadata={"parent_id": f"LS-{i // docs_per_case}", "chunk_index": i % docs_per_case},
+                        doc_id=f"doc_{i}"
+                    )
+                    for i in range(start, min(start + 10000, size))
+                ])
+            rng = np.random.default_rng(0)
+            queries = data[rng.choice(size, size=query_count)]
+            cases = [f"LS-{c}" for c in rng.integers(size // docs_per_case, size=query_count)]
+
+            def p50(search):
+                latencies = []
+                for query, case in zip(queries, cases):
+                    t0 = time.perf_counter()
+                    search(query[None, :], case)
+                    latencies.append(time.perf_counter() - t0)
+                return 1000 * statistics.median(latencies)
+
+            unfiltered = p50(lambda q, case: store.search_by_vectors(q, limit=limit))
+            scoped = p50(lambda q, case: store.search_by_vectors(q, limit=limit, filters={"parent_id": case}))
+            print(f"{size:>10} {unfiltered:13.3f}ms {scoped:14.3f}ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Case-scoped (filtered) vs unfiltered search latency as the collection grows.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 200000])
+    parser.add_argument("--docs-per-case", type=int, default=20)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=3)
+    args = parser.parse_args()
+    run_benchmark(args.sizes, args.docs_per_case, args.dim, args.queries, args.limit)
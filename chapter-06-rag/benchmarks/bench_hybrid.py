@@ -0,0 +1,43 @@
+# benchmarks/bench_hybrid.py
+# Run from chapter-06-rag:  python -m benchmarks.bench_hybrid --docs 5000
+import argparse
+import statistics
+import tempfile
+import time
+
+from src.infrastructure.chroma_store import ChromaVectorStore
+from benchmarks.bench_bulk_ingest import make_documents, SENTENCES
+
+def run_benchmark(doc_count: int, query_count: int, limit: int):
+    # Each question names an exact reference number, the case pure embeddings rank poorly
+    targets = [(i * 7919) % doc_count for i in range(query_count)]
+    queries = [f"{SENTENCES[t % len(SENTENCES)]} Reference {t}." for t in targets]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ChromaVectorStore(collection_name="bench_hybrid", persist_path=tmp, result_cache_size=0)
+        store.add_documents_bulk(make_documents(doc_count))
+        start = time.perf_counter()
+        store.search("warm up", mode="lexical")
+        build_ms = 1000 * (time.perf_counter() - start)
+
+        print(f"Corpus: {doc_count} docs | queries={query_count} | limit={limit}")
+        print(f"Inverted index built lazily in {build_ms:.0f}ms")
+        print(f"{'mode':<8} {'hit@k':>7} {'p50 ms':>8} {'p95 ms':>8}")
+        for mode in ("vector", "lexical", "hybrid"):
+            latencies, hits = [], 0
+            for target, query in zip(targets, queries):
+                t0 = time.perf_counter()
+                docs = store.search(query, limit=limit, mode=mode)
+                latencies.append(time.perf_counter() - t0)
+                hits += any(doc.doc_id == f"bench_{target}" for doc in docs)
+            latencies.sort()
+            print(f"{mode:<8} {hits / query_count:7.2f} {1000 * statistics.median(latencies):8.2f} "
+                  f"{1000 * latencies[int(0.95 * (len(latencies) - 1))]:8.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vector vs BM25 vs hybrid (RRF) retrieval: exact-term hit rate and latency.")
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=3)
+    args = parser.parse_args()
+    run_benchmark(args.docs, args.queries, args.limit)
@@ -0,0 +1,83 @@
+# benchmarks/bench_quantized.py
+# Run from chapter-06-rag:  python -m benchmarks.bench_quantized --vectors 100000
+import argparse
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from src.interfaces import IngestionDocument
+from src.infrastructure.numpy_store import NumpyVectorStore
+from src.infrastructure.quantized_store import QuantizedVectorStore
+
+class LookupEmbedding:
+    """Maps 'vec:<i>' to row i of a precomputed matrix, so the benchmark needs no model."""
+    def __init__(self, matrix: np.ndarray):
+        self.matrix = matrix
+
+    def __call__(self, input):
+        return [self.matrix[int(text.split(":", 1)[1])] for text in input]
+
+def make_vectors(count: int, dim: int, clusters: int, seed: int = 0) -> np.ndarray:
+    """Clustered unit vectors, closer to real embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(clusters, size=count)] + 0.6 * rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def recall_at_k(truth, found) -> float:
+    hits = sum(len({d.doc_id for d in t} & {d.doc_id for d in f}) for t, f in zip(truth, found))
+    return hits / sum(len(t) for t in truth)
+
+def run_benchmark(count: int, dim: int, query_count: int, k: int, nlist: int):
+    data = make_vectors(count, dim, clusters=max(8, nlist // 4))
+    rng = np.random.default_rng(1)
+    queries = data[rng.choice(count, size=query_count, replace=False)] + 0.3 * rng.standard_normal((query_count, dim)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = NumpyVectorStore("bench_quantized", persist_path=tmp, embedding_function=LookupEmbedding(data))
+        for start in range(0, count, 10000):
+            base.add_documents([
+                IngestionDocument(content=f"vec:{i}", metadata={"row": i}, doc_id=f"doc_{i}")
+                for i in range(start, min(start + 10000, count))
+            ])
+
+        def timed(search):
+            latencies, found = [], []
+            for query in queries:
+                t0 = time.perf_counter()
+                found.append(search(query[None, :])[0])
+                latencies.append(time.perf_counter() - t0)
+            return found, 1000 * statistics.median(latencies)
+
+        truth, exact_ms = timed(lambda q: base.search_by_vectors(q, limit=k))
+        print(f"Vectors: {count} x {dim} | queries={query_count} | k={k} | nlist={nlist}")
+        print(f"{'index':<12} {'nprobe':>6} {'rerank':>6} {'recall@k':>9} {'bytes/vec':>9} {'p50 ms':>8}")
+        print(f"{'flat f32':<12} {'-':>6} {'-':>6} {1.0:9.3f} {4 * dim:9d} {exact_ms:8.3f}")
+        print(f"(every index also keeps ~{base.resident_bytes_per_row():.0f} bytes/vec of ids, texts and metadata in RAM)")
+
+        configs = [('sq8', {}), ('pq', {"pq_subvectors": dim // 8}), ('pq', {"pq_subvectors": dim // 16})]
+        for quantization, options in configs:
+            index = QuantizedVectorStore(base, quantization=quantization, nlist=nlist, **options)
+            t0 = time.perf_counter()
+            index.train()
+            train_s = time.perf_counter() - t0
+            label = quantization if quantization == 'sq8' else f"pq{index.pq_subvectors}"
+            for nprobe in (1, 4, 16):
+                for rerank in (0, 4 * k):
+                    found, ms = timed(lambda q: index.search_by_vectors(q, limit=k, nprobe=nprobe, rerank=rerank))
+                    print(f"{label:<12} {nprobe:6d} {rerank:6d} {recall_at_k(truth, found):9.3f} "
+                          f"{index.memory_bytes_per_vector():9.0f} {ms:8.3f}")
+            print(f"{label:<12} trained in {train_s:.1f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall, memory and latency of the quantized IVF index vs exact search.")
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=256)
+    args = parser.parse_args()
+    run_benchmark(args.vectors, args.dim, args.queries, args.k, args.nlist)
@@ -0,0 +1,215 @@
+# benchmarks/bench_rag_suite.py
+# Run from chapter-06-rag:  python -m benchmarks.bench_rag_suite --chunking 50:10,100:20 --output rag_suite.json
+# Compare with an earlier run:  python -m benchmarks.bench_rag_suite --baseline rag_suite.json
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+
+from src.infrastructure.chroma_store import ChromaVectorStore
+from src.infrastructure.numpy_store import NumpyVectorStore
+from src.infrastructure.quantized_store import QuantizedVectorStore
+from src.services.text_ingestion import TextIngestionService
+
+BACKENDS = ("chroma", "numpy", "quantized")
+
+PLACES = ["Haifa", "Ashdod", "Eilat", "Tel Aviv", "Jerusalem", "Beersheba", "Nazareth", "Netanya"]
+CARGO = ["glassware", "electronics", "frozen food", "pharmaceuticals", "furniture", "textiles", "auto parts", "paper goods"]
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Sunday"]
+
+# (fact, question) templates. Every fact carries a unique code, which is how a
+# question is labelled with the chunks that answer it.
+TEMPLATES = [
+    ("Depot {code} in {place} dispatches {cargo} every {day} before {hour:02d}:00.",
+     "When does depot {code} send out its {cargo}?"),
+    ("Trucks carrying {cargo} on route {code} out of {place} are limited to {speed} km/h.",
+     "What is the speed limit for trucks on route {code}?"),
+    ("Drivers working under contract {code} must rest {rest} minutes after every {hours} hours of driving near {place}.",
+     "How long is the mandatory break for drivers on contract {code}?"),
+    ("Damaged {cargo} on shipment {code} must be photographed and reported to the {place} claims desk within {hours} hours.",
+     "Where should damage on shipment {code} be reported?"),
+]
+
+def make_corpus(fact_count: int, facts_per_doc: int, seed: int = 0):
+    """
+    Synthetic policy documents plus labelled questions.
+    Returns (documents, questions): documents are (source, text) pairs, questions are
+    (question, code) pairs; a chunk answers a question if it contains the code.
+    """
+    rng = random.Random(seed)
+    facts, questions = [], []
+    for i in range(fact_count):
+        fact_template, question_template = TEMPLATES[i % len(TEMPLATES)]
+        values = {
+            "code": f"{'DRCS'[i % len(TEMPLATES)]}-{i:05d}",
+            "place": rng.choice(PLACES), "cargo": rng.choice(CARGO), "day": rng.choice(DAYS),
+            "hour": rng.randint(5, 20), "speed": rng.choice([30, 50, 60, 80, 90]),
+            "rest": rng.choice([15, 30, 45]), "hours": rng.choice([2, 4, 6, 24, 48]),
+        }
+        facts.append(fact_template.format(**values))
+        questions.append((question_template.format(**values), values["code"]))
+
+    documents = []
+    for d, start in enumerate(range(0, fact_count, facts_per_doc)):
+        doc_facts = facts[start:start + facts_per_doc]
+        paragraphs = [" ".join(doc_facts[p:p + 4]) for p in range(0, len(doc_facts), 4)]
+        documents.append((f"policy_{d:04d}", "\n\n".join(paragraphs)))
+    return documents, questions
+
+def label_chunks(service: TextIngestionService, documents, questions) -> Dict[str, set]:
+    """code -> IDs of the chunks (under this service's chunking) that contain it."""
+    codes = {code for _, code in questions}
+    relevant: Dict[str, set] = {code: set() for code in codes}
+    for source, text in documents:
+        for chunk in service._create_chunks(text):
+            for word in chunk.split():
+                code = word.rstrip(".,")
+                if code in codes:
+                    relevant[code].add(service.chunk_id(source, chunk))
+    return relevant
+
+def directory_bytes(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(math.ceil(pct / 100 * len(ordered))) - 1)]
+
+def make_store(backend: str, path: str, embedding_function):
+    if backend == "chroma":
+        return ChromaVectorStore(collection_name="rag_suite", persist_path=path, embedding_function=embedding_function,
+                                 result_cache_size=0, embedding_cache_size=0)
+    # "quantized" ingests into a flat store too and is wrapped once there is data to train on
+    return NumpyVectorStore(collection_name="rag_suite", persist_path=path, embedding_function=embedding_function)
+
+def run_config(backend: str, chunk_size: int, chunk_overlap: int, documents, questions,
+               k: int, embedding_function, workdir: str) -> dict:
+    path = os.path.join(workdir, f"{backend}_{chunk_size}_{chunk_overlap}")
+    store = make_store(backend, path, embedding_function)
+    service = TextIngestionService(store, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+    start = time.perf_counter()
+    chunk_count = sum(service.ingest_text(text, {"source": source}) for source, text in documents)
+    if backend == "quantized":
+        nlist = max(1, min(256, int(math.sqrt(chunk_count))))
+        store = QuantizedVectorStore(store, quantization="sq8", nlist=nlist, nprobe=max(1, nlist // 4))
+        store.train()
+    ingest_seconds = time.perf_counter() - start
+
+    relevant = label_chunks(service, documents, questions)
+    latencies, hits, reciprocal_ranks = [], 0, []
+    for question, code in questions:
+        start = time.perf_counter()
+        results = store.search(question, limit=k)
+        latencies.append(1000 * (time.perf_counter() - start))
+        rank = next((i for i, doc in enumerate(results, start=1) if doc.doc_id in relevant[code]), None)
+        hits += rank is not None
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+
+    return {
+        "backend": backend,
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "chunks": chunk_count,
+        "ingest_seconds": ingest_seconds,
+        "chunks_per_second": chunk_count / ingest_seconds if ingest_seconds > 0 else 0.0,
+        "index_bytes": directory_bytes(path),
+        "latency_ms": {"p50": percentile(latencies, 50), "p95": percentile(latencies, 95),
+                       "p99": percentile(latencies, 99), "mean": statistics.fmean(latencies)},
+        f"recall_at_{k}": hits / len(questions),
+        f"mrr_at_{k}": statistics.fmean(reciprocal_ranks),
+    }
+
+def config_key(result: dict) -> Tuple:
+    return result["backend"], result["chunk_size"], result["chunk_overlap"]
+
+def compare(results: List[dict], baseline_path: str, k: int):
+    """Prints per-config deltas against an earlier run and flags quality or latency regressions."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {config_key(r): r for r in json.load(f)["results"]}
+    print(f"\nCompared with {baseline_path}:")
+    for result in results:
+        before = baseline.get(config_key(result))
+        if before is None or f"recall_at_{k}" not in before:
+            continue
+        recall_delta = result[f"recall_at_{k}"] - before[f"recall_at_{k}"]
+        mrr_delta = result[f"mrr_at_{k}"] - before[f"mrr_at_{k}"]
+        p95_ratio = result["latency_ms"]["p95"] / max(before["latency_ms"]["p95"], 1e-9)
+        flag = "  <-- REGRESSION" if recall_delta < -0.01 or mrr_delta < -0.01 or p95_ratio > 1.2 else ""
+        print(f"  {result['backend']:<9} {result['chunk_size']:>4}/{result['chunk_overlap']:<3} "
+              f"recall {recall_delta:+.3f} | MRR {mrr_delta:+.3f} | p95 x{p95_ratio:.2f}{flag}")
+
+def run_suite(fact_count: int, facts_per_doc: int, query_count: int, chunkings: List[Tuple[int, int]],
+              backends: List[str], k: int, embedding_function=None, seed: int = 0) -> dict:
+    if embedding_function is None:
+        # The local ONNX model: no API key and no network once it is cached
+        from chromadb.utils import embedding_functions
+        embedding_function = embedding_functions.DefaultEmbeddingFunction()
+
+    documents, questions = make_corpus(fact_count, facts_per_doc, seed)
+    questions = random.Random(seed + 1).sample(questions, min(query_count, len(questions)))
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for chunk_size, chunk_overlap in chunkings:
+            for backend in backends:
+                result = run_config(backend, chunk_size, chunk_overlap, documents, questions, k, embedding_function, workdir)
+                results.append(result)
+                print(f"{backend:<9} {chunk_size:>4}/{chunk_overlap:<3} {result['chunks']:6d} "
+                      f"{result['chunks_per_second']:9.1f} {result['index_bytes'] / 1024:9.1f} "
+                      f"{result['latency_ms']['p50']:7.2f} {result['latency_ms']['p95']:7.2f} "
+                      f"{result[f'recall_at_{k}']:8.3f} {result[f'mrr_at_{k}']:6.3f}", flush=True)
+
+    return {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "embedding_function": type(embedding_function).__name__,
+        "corpus": {"facts": fact_count, "facts_per_doc": facts_per_doc, "documents": len(documents),
+                   "queries": len(questions), "seed": seed},
+        "k": k,
+        "results": results,
+    }
+
+def parse_chunkings(value: str) -> List[Tuple[int, int]]:
+    pairs = []
+    for item in value.split(","):
+        size, overlap = item.split(":")
+        if int(overlap) >= int(size):
+            raise argparse.ArgumentTypeError(f"Overlap must be smaller than chunk size: {item}")
+        pairs.append((int(size), int(overlap)))
+    return pairs
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Retrieval quality and performance across chunking and backend settings.")
+    parser.add_argument("--facts", type=int, default=2000)
+    parser.add_argument("--facts-per-doc", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--chunking", type=parse_chunkings, default=parse_chunkings("50:10,100:20,200:40"),
+                        help="Comma-separated chunk_size:chunk_overlap pairs (in words).")
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="rag_suite_results.json")
+    parser.add_argument("--baseline", default=None, help="Earlier results JSON to compare against.")
+    args = parser.parse_args()
+
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    unknown = set(backends) - set(BACKENDS)
+    if unknown:
+        parser.error(f"Unknown backends: {sorted(unknown)}")
+
+    print(f"{'backend':<9} {'chunking':<8} {'chunks':>6} {'chunks/s':>9} {'index KB':>9} "
+          f"{'p50 ms':>7} {'p95 ms':>7} {'recall@' + str(args.k):>8} {'MRR':>6}")
+    report = run_suite(args.facts, args.facts_per_doc, args.queries, args.chunking, backends, args.k, seed=args.seed)
+    if args.baseline:
+        compare(report["results"], args.baseline, args.k)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results written to {args.output}")
@@ -0,0 +1,51 @@
+# benchmarks/bench_search_many.py
+# Run from chapter-06-rag:  python -m benchmarks.bench_search_many --queries 1000
+import argparse
+import tempfile
+import time
+
+from src.infrastructure.chroma_store import ChromaVectorStore
+from benchmarks.bench_bulk_ingest import make_documents
+
+QUESTIONS = [
+    "What is the speed limit in the city?",
+    "How long should I rest after driving?",
+    "What do I do after an accident?",
+    "When must defects be reported?",
+    "What does shipment LS-2026-X contain?",
+]
+
+def run_benchmark(doc_count: int, query_count: int, limit: int, batch_size: int):
+    queries = [f"{QUESTIONS[i % len(QUESTIONS)]} ({i})" for i in range(query_count)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Both loops run the same queries, so caching would turn the second one into cache hits
+        store = ChromaVectorStore(collection_name="bench_search", persist_path=tmp,
+                                  result_cache_size=0, embedding_cache_size=0)
+        store.add_documents_bulk(make_documents(doc_count))
+
+        start = time.perf_counter()
+        looped = [store.search(query, limit=limit) for query in queries]
+        loop_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batched = store.search_many(queries, limit=limit, batch_size=batch_size)
+        batch_elapsed = time.perf_counter() - start
+
+    same = sum(
+        [d.doc_id for d in a] == [d.doc_id for d in b] for a, b in zip(looped, batched)
+    )
+    print(f"Corpus: {doc_count} docs | queries={query_count} | limit={limit} | batch_size={batch_size}")
+    print(f"loop over search: {query_count / loop_elapsed:8.1f} queries/sec")
+    print(f"search_many     : {query_count / batch_elapsed:8.1f} queries/sec "
+          f"({loop_elapsed / batch_elapsed:.1f}x)")
+    print(f"Identical result lists: {same}/{query_count}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batched multi-query search vs. looping over search().")
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+    run_benchmark(args.docs, args.queries, args.limit, args.batch_size)
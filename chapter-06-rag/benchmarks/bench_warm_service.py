@@ -0,0 +1,88 @@
+# benchmarks/bench_warm_service.py
+# Run from chapter-06-rag:  python -m benchmarks.bench_warm_service --queries 200
+# Needs the driver_policy collection:  python -m src.indexer
+import argparse
+import asyncio
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from src.rag_server import query_service
+from benchmarks.bench_search_many import QUESTIONS
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+def timed_process(code: str) -> float:
+    """Wall time of a fresh interpreter running `code`: the cost every CLI invocation pays."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+def wait_for_port(port: int, timeout: float) -> float:
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return time.perf_counter() - start
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError(f"RAG query service did not start within {timeout}s")
+
+async def warm_queries(port: int, query_count: int, concurrency: int):
+    queries = [QUESTIONS[i % len(QUESTIONS)] for i in range(query_count)]
+
+    # Sequential round trips: latency of one warm request
+    latencies = []
+    for i, question in enumerate(queries):
+        start = time.perf_counter()
+        response = await query_service({"id": i, "op": "retrieve", "question": question}, port=port)
+        latencies.append(1000 * (time.perf_counter() - start))
+        if not response["ok"]:
+            raise RuntimeError(response["error"])
+
+    # Concurrent clients: throughput of the resident service
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(i: int, question: str):
+        async with slots:
+            return await query_service({"id": i, "op": "retrieve", "question": question}, port=port)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i, q) for i, q in enumerate(queries)))
+    throughput = query_count / (time.perf_counter() - start)
+    return latencies, throughput
+
+def run_benchmark(query_count: int, cold_runs: int, concurrency: int, port: int):
+    question = QUESTIONS[0]
+    import_times = [timed_process("import src.simple_rag") for _ in range(cold_runs)]
+    cold_times = [timed_process(f"from src.simple_rag import retrieve; retrieve({question!r})")
+                  for _ in range(cold_runs)]
+
+    server = subprocess.Popen([sys.executable, "-m", "src.rag_server", "--port", str(port)],
+                              stdout=subprocess.DEVNULL)
+    try:
+        startup = wait_for_port(port, timeout=300)
+        latencies, throughput = asyncio.run(warm_queries(port, query_count, concurrency))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"Queries: {query_count} | cold runs: {cold_runs} | concurrency: {concurrency}")
+    print(f"import src.simple_rag (lazy)      : {1000 * statistics.median(import_times):8.1f} ms")
+    print(f"Cold CLI retrieve (new process)   : {1000 * statistics.median(cold_times):8.1f} ms")
+    print(f"Service startup (paid once)       : {1000 * startup:8.1f} ms")
+    print(f"Warm retrieve p50 / p95           : {percentile(latencies, 50):8.2f} / {percentile(latencies, 95):.2f} ms")
+    print(f"Warm throughput ({concurrency} clients)       : {throughput:8.1f} queries/sec")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold-start CLI vs. warm resident query service latency.")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--cold-runs", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--port", type=int, default=8799)
+    args = parser.parse_args()
+    run_benchmark(args.queries, args.cold_runs, args.concurrency, args.port)
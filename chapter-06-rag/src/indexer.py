@@ -1,53 +1,103 @@
 import os
-import chromadb
-from chromadb.utils import embedding_functions
-
-# Initialize a persistent Chroma client.
-# This will store the vector index on disk under ./chroma_db
-client = chromadb.PersistentClient(path="./chroma_db")
-
-# Try to read the OpenAI API key from environment variables
-openai_key = os.getenv("OPENAI_API_KEY")
-
-# Choose embedding function:
-# - If OPENAI_API_KEY is set -> use OpenAI embeddings (higher quality, remote)
-# - Otherwise -> fall back to a local/default embedding function (no external calls)
-if openai_key:
-    emb_fn = embedding_functions.OpenAIEmbeddingFunction(api_key=openai_key)
-else:
-    emb_fn = embedding_functions.DefaultEmbeddingFunction()
-
-# Get or create a collection named "driver_policy".
-# A collection is like a logical table for related documents and their embeddings.
-collection = client.get_or_create_collection(
-    name="driver_policy",
-    embedding_function=emb_fn,
-)
-
-def index_document(file_path: str):
+from functools import lru_cache
+
+# Chroma, the embedding model and the API client are created on first use,
+# so importing this module (e.g. from the query server) costs almost nothing.
+CHROMA_PATH = "./chroma_db"
+COLLECTION_NAME = "driver_policy"
+
+def use_openai() -> bool:
+    # Try to read the OpenAI API key from environment variables
+    return bool(os.getenv("OPENAI_API_KEY"))
+
+@lru_cache(maxsize=None)
+def get_embedding_function():
+    from chromadb.utils import embedding_functions
+
+    # Choose embedding function:
+    # - If OPENAI_API_KEY is set -> use OpenAI embeddings (higher quality, remote)
+    # - Otherwise -> fall back to a local/default embedding function (no external calls)
+    if use_openai():
+        return embedding_functions.OpenAIEmbeddingFunction(api_key=os.getenv("OPENAI_API_KEY"))
+    return embedding_functions.DefaultEmbeddingFunction()
+
+@lru_cache(maxsize=None)
+def get_collection():
+    import chromadb
+
+    # Initialize a persistent Chroma client.
+    # This will store the vector index on disk under ./chroma_db
+    client = chromadb.PersistentClient(path=CHROMA_PATH)
+
+    # Get or create a collection named "driver_policy".
+    # A collection is like a logical table for related documents and their embeddings.
+    return client.get_or_create_collection(
+        name=COLLECTION_NAME,
+        embedding_function=get_embedding_function(),
+    )
+
+def iter_paragraphs(f, max_chars: int = 4000):
     """
-    Read a text file, split it into chunks, and index those chunks into ChromaDB.
+    Yield paragraphs (blocks separated by blank lines) one at a time,
+    so only the current paragraph is held in memory.
+
+    A paragraph longer than max_chars (a file without blank lines, or even without
+    newlines) is yielded in pieces of at most max_chars, cut at whitespace where
+    there is some, so memory stays bounded whatever the file looks like.
     """
-    # Read the entire document from disk
+    buf = ""
+    # readline(max_chars) also bounds a single overlong line
+    for line in iter(lambda: f.readline(max_chars), ""):
+        if not line.strip():
+            if buf:
+                yield buf.rstrip("\n")
+                buf = ""
+            continue
+        buf += line
+        while len(buf) > max_chars:
+            cut = max(buf.rfind(" ", 0, max_chars + 1), buf.rfind("\n", 0, max_chars + 1))
+            if cut <= 0:
+                cut = max_chars
+            yield buf[:cut].rstrip()
+            buf = buf[cut:].lstrip()
+    if buf:
+        yield buf.rstrip("\n")
+
+def index_document(file_path: str, batch_size: int = 64):
+    """
+    Stream a text file, split it into chunks, and index those chunks into ChromaDB.
+    """
+    collection = get_collection()
+    total = 0
+    batch = []
+
+    def flush():
+        # Upsert = insert new chunks or update existing ones with the same IDs
+        ids = [f"chunk_{i}" for i in range(total - len(batch), total)]
+        # Attach simple metadata to each chunk (can be extended later)
+        # chunk_index lets context assembly merge neighbouring paragraphs back together
+        metadatas = [
+            {"source": "policy_v1", "chapter": "unknown", "chunk_index": i}
+            for i in range(total - len(batch), total)
+        ]
+        collection.upsert(ids=ids, documents=batch, metadatas=metadatas)
+        batch.clear()
+
+    # Naive chunking strategy: paragraph-level chunks, read lazily from disk
+    # and written in bounded batches instead of loading the whole file
     with open(file_path, 'r', encoding='utf-8') as f:
-        text = f.read()
-    
-    # Naive chunking strategy: split the text by double newlines (paragraph-level)
-    chunks = text.split('\n\n')
-    
-    # Create unique IDs for each chunk
-    ids = [f"chunk_{i}" for i in range(len(chunks))]
-    
-    # Attach simple metadata to each chunk (can be extended later)
-    metadatas = [{"source": "policy_v1", "chapter": "unknown"} for _ in chunks]
-    
-    # Upsert = insert new chunks or update existing ones with the same IDs
-    collection.upsert(ids=ids, documents=chunks, metadatas=metadatas)
+        for paragraph in iter_paragraphs(f):
+            batch.append(paragraph)
+            total += 1
+            if len(batch) >= batch_size:
+                flush()
+    if batch:
+        flush()
     
     # Print a simple confirmation message
     print(
-        f"Indexed {len(chunks)} chunks into ChromaDB using "
-        f"{'OpenAIEmbeddingFunction' if openai_key else 'DefaultEmbeddingFunction'}."
+        f"Indexed {total} chunks into ChromaDB using "
+        f"{'OpenAIEmbeddingFunction' if use_openai() else 'DefaultEmbeddingFunction'}."
     )
 
 if __name__ == "__main__":
@@ -1,16 +1,86 @@
+import time
+from dataclasses import replace
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 import chromadb
-from src.interfaces import VectorStoreInterface, IngestionDocument
-from typing import List
+from chromadb.utils import embedding_functions
+from src.interfaces import VectorStoreInterface, IngestionDocument, BulkIngestionReport, BatchFailure, MetadataFilter
+from src.infrastructure.query_cache import LRUCache, normalize_query
+from src.infrastructure.lexical_index import InvertedIndex, reciprocal_rank_fusion
+from src.infrastructure.metadata_filter import filter_cache_key, to_chroma_where
+from typing import List, Dict, Any, Literal, Optional
+
+RetrievalMode = Literal['vector', 'lexical', 'hybrid']
 
 class ChromaVectorStore(VectorStoreInterface):
-    def __init__(self, collection_name: str, persist_path: str = "./.chromadb"):
+    def __init__(
+        self,
+        collection_name: str,
+        persist_path: str = "./.chromadb",
+        embedding_function=None,
+        result_cache_size: int = 256,
+        embedding_cache_size: int = 1024,
+        retrieval_mode: RetrievalMode = 'vector',
+        hybrid_candidates: int = 4,
+    ):
         self.client = chromadb.PersistentClient(path=persist_path)
-        self.collection = self.client.get_or_create_collection(name=collection_name)
+        # Keep a handle on the embedding function so bulk ingestion can embed outside of Chroma
+        self.embedding_function = embedding_function or embedding_functions.DefaultEmbeddingFunction()
+        self.collection = self.client.get_or_create_collection(
+            name=collection_name,
+            embedding_function=self.embedding_function
+        )
+        # Retrieval caches. Result keys include the collection version, which every write
+        # through this store bumps once the write is done, so stale results are never
+        # served after a change.
+        # Writes made by other processes to the same collection are not tracked.
+        self.version = 0
+        self._result_cache = LRUCache(result_cache_size)
+        self._embedding_cache = LRUCache(embedding_cache_size)
+        # BM25 index for 'lexical' and 'hybrid' retrieval. It is built from the collection
+        # on first use and then kept in sync by every write through this store.
+        self.retrieval_mode = retrieval_mode
+        self.hybrid_candidates = hybrid_candidates
+        self._lexical = InvertedIndex()
+        self._lexical_ready = False
+
+    def _ensure_lexical_index(self, page_size: int = 1000):
+        if self._lexical_ready:
+            return
+        offset = 0
+        while True:
+            page = self.collection.get(include=["documents"], limit=page_size, offset=offset)
+            for doc_id, content in zip(page['ids'], page['documents']):
+                self._lexical.add(doc_id, content or "")
+            if len(page['ids']) < page_size:
+                break
+            offset += page_size
+        self._lexical_ready = True
+
+    def _bump_version(self):
+        self.version += 1
+
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hit/miss counters for the result and query-embedding caches."""
+        return {
+            "results": self._result_cache.stats(),
+            "embeddings": self._embedding_cache.stats(),
+        }
+
+    def count(self) -> int:
+        return self.collection.count()
 
     def reset(self):
         """Clears all data in the collection."""
-        self.client.delete_collection(self.collection.name)
-        self.collection = self.client.get_or_create_collection(name=self.collection.name)
+        try:
+            self.client.delete_collection(self.collection.name)
+            self.collection = self.client.get_or_create_collection(
+                name=self.collection.name,
+                embedding_function=self.embedding_function
+            )
+        finally:
+            self._lexical.clear()
+            self._lexical_ready = True
+            self._bump_version()
     def add_documents(self, documents: List[IngestionDocument]) -> bool:
         try:
             ids = [doc.doc_id for doc in documents]
@@ -22,20 +92,230 @@ class ChromaVectorStore(VectorStoreInterface):
                 documents=contents,
                 metadatas=metadatas
             )
+            if self._lexical_ready:
+                for doc in documents:
+                    self._lexical.add(doc.doc_id, doc.content)
+            return True
+        except Exception as e:
+            print(f"ChromaDB Error: {e}")
+            return False
+        finally:
+            # After the write: a search that ran during it cached under the old version
+            self._bump_version()
+
+    def delete_documents(self, doc_ids: List[str]) -> bool:
+        if not doc_ids:
+            return True
+        try:
+            self.collection.delete(ids=list(doc_ids))
+            if self._lexical_ready:
+                for doc_id in doc_ids:
+                    self._lexical.remove(doc_id)
             return True
         except Exception as e:
             print(f"ChromaDB Error: {e}")
             return False
+        finally:
+            self._bump_version()
+
+    def update_metadata(self, doc_ids: List[str], metadatas: List[Dict[str, Any]]) -> bool:
+        if not doc_ids:
+            return True
+        try:
+            # Passing only metadatas keeps the stored embeddings untouched
+            self.collection.update(ids=list(doc_ids), metadatas=list(metadatas))
+            return True
+        except Exception as e:
+            print(f"ChromaDB Error: {e}")
+            return False
+        finally:
+            self._bump_version()
+
+    def add_documents_bulk(
+        self,
+        documents: List[IngestionDocument],
+        batch_size: int = 256,
+        max_workers: int = 4,
+    ) -> BulkIngestionReport:
+        """
+        Splits documents into batches, embeds the batches in parallel worker threads
+        and upserts each batch as soon as its embeddings are ready.
+        At most 2 * max_workers batches are in flight, so memory stays bounded.
+        """
+        if batch_size <= 0 or max_workers <= 0:
+            raise ValueError("batch_size and max_workers must be positive.")
+
+        report = BulkIngestionReport(total_documents=len(documents))
+        start = time.perf_counter()
+        batches = [documents[i:i + batch_size] for i in range(0, len(documents), batch_size)]
+
+        def embed(batch: List[IngestionDocument]):
+            return self.embedding_function([doc.content for doc in batch])
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            pending = {}
+            next_batch = 0
+            while next_batch < len(batches) or pending:
+                # Keep the embedding workers busy while the main thread upserts
+                while next_batch < len(batches) and len(pending) < 2 * max_workers:
+                    pending[pool.submit(embed, batches[next_batch])] = next_batch
+                    next_batch += 1
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch_index = pending.pop(future)
+                    batch = batches[batch_index]
+                    try:
+                        self.collection.upsert(
+                            ids=[doc.doc_id for doc in batch],
+                            embeddings=future.result(),
+                            documents=[doc.content for doc in batch],
+                            metadatas=[doc.metadata for doc in batch]
+                        )
+                        report.stored_documents += len(batch)
+                        if self._lexical_ready:
+                            for doc in batch:
+                                self._lexical.add(doc.doc_id, doc.content)
+                    except Exception as e:
+                        report.failed_batches.append(BatchFailure(
+                            batch_index=batch_index,
+                            doc_ids=[doc.doc_id for doc in batch],
+                            error=str(e)
+                        ))
+
+        self._bump_version()
+        report.failed_batches.sort(key=lambda failure: failure.batch_index)
+        report.elapsed_seconds = time.perf_counter() - start
+        return report
+
+    def _embed_queries(self, queries: List[str]) -> List[Any]:
+        """Query embeddings, served from the embedding cache (keyed by the exact text) where possible."""
+        embeddings = [self._embedding_cache.get(query) for query in queries]
+        missing = sorted({query for query, emb in zip(queries, embeddings) if emb is None})
+        if missing:
+            fresh = dict(zip(missing, self.embedding_function(missing)))
+            for query, emb in fresh.items():
+                self._embedding_cache.put(query, emb)
+            embeddings = [emb if emb is not None else fresh[query]
+                          for query, emb in zip(queries, embeddings)]
+        return embeddings
+
+    @staticmethod
+    def _copy_documents(docs: List[IngestionDocument]) -> List[IngestionDocument]:
+        """Copies of cached documents, so callers editing metadata do not change the cache."""
+        return [replace(doc, metadata=dict(doc.metadata) if doc.metadata is not None else None) for doc in docs]
+
+    def search(
+        self,
+        query_text: str,
+        limit: int = 3,
+        filters: Optional[MetadataFilter] = None,
+        *,
+        mode: Optional[RetrievalMode] = None,
+    ) -> List[IngestionDocument]:
+        return self.search_many([query_text], limit=limit, filters=filters, mode=mode)[0]
+
+    def search_many(
+        self,
+        queries: List[str],
+        limit: int = 3,
+        filters: Optional[MetadataFilter] = None,
+        *,
+        batch_size: int = 64,
+        mode: Optional[RetrievalMode] = None,
+    ) -> List[List[IngestionDocument]]:
+        """
+        Embeds queries batch_size at a time and sends one collection.query per batch,
+        instead of one embedding call and one query per question.
+        Repeated queries are answered from the result cache.
+
+        mode (default: the store's retrieval_mode):
+          'vector'  - embedding similarity only
+          'lexical' - BM25 over the in-process inverted index only
+          'hybrid'  - reciprocal-rank fusion of both candidate lists, which keeps
+                      exact terms and numbers ("45-minute", "LS-2026-X") near the top
+
+        filters are pushed down to Chroma's `where` clause (and restrict the BM25
+        candidates too), so a case-scoped question only ranks that case's chunks.
+        """
+        mode = mode or self.retrieval_mode
+        if mode not in ('vector', 'lexical', 'hybrid'):
+            raise ValueError(f"Unknown retrieval mode: {mode}")
+        where = to_chroma_where(filters)
+        scope = filter_cache_key(filters)
+        version = self.version
+        # The normalized text is only the cache key; the caller's text is what gets embedded
+        normalized = [normalize_query(query) for query in queries]
+        all_docs: List[Any] = [self._result_cache.get((key, limit, mode, scope, version)) for key in normalized]
+        # Deduplicate misses so a query repeated inside one call is only run once
+        missing: Dict[str, str] = {}
+        for key, query, docs in zip(normalized, queries, all_docs):
+            if docs is None:
+                missing.setdefault(key, query)
+
+        texts = list(missing.values())
+        if mode == 'vector':
+            by_text = self._vector_search(texts, limit, batch_size, where)
+        else:
+            by_text = self._lexical_search(texts, limit, batch_size, where, hybrid=(mode == 'hybrid'))
+        fetched = {key: by_text[query] for key, query in missing.items()}
+        for key, docs in fetched.items():
+            self._result_cache.put((key, limit, mode, scope, version), docs)
+
+        return [self._copy_documents(docs if docs is not None else fetched[key])
+                for key, docs in zip(normalized, all_docs)]
+
+    def _vector_search(
+        self, queries: List[str], limit: int, batch_size: int, where: Optional[Dict[str, Any]]
+    ) -> Dict[str, List[IngestionDocument]]:
+        fetched: Dict[str, List[IngestionDocument]] = {}
+        for i in range(0, len(queries), batch_size):
+            batch = queries[i:i + batch_size]
+            embeddings = self._embed_queries(batch)
+            results = self.collection.query(query_embeddings=embeddings, n_results=limit, where=where)
+            for row, query in enumerate(batch):
+                fetched[query] = self._to_documents(results, row)
+        return fetched
+
+    def _lexical_search(
+        self, queries: List[str], limit: int, batch_size: int, where: Optional[Dict[str, Any]], hybrid: bool
+    ) -> Dict[str, List[IngestionDocument]]:
+        self._ensure_lexical_index()
+        candidates = limit * self.hybrid_candidates if hybrid else limit
+        vector_hits = self._vector_search(queries, candidates, batch_size, where) if hybrid else {}
+        # Chroma resolves the filter once; BM25 then only scores documents in scope
+        allowed_ids = set(self.collection.get(where=where, include=[])['ids']) if where else None
+
+        fetched: Dict[str, List[IngestionDocument]] = {}
+        for query in queries:
+            lexical_ids = [doc_id for doc_id, _score in self._lexical.search(query, candidates, allowed_ids)]
+            if hybrid:
+                vector_ids = [doc.doc_id for doc in vector_hits[query]]
+                ranked = [doc_id for doc_id, _score in reciprocal_rank_fusion([vector_ids, lexical_ids])]
+            else:
+                ranked = lexical_ids
+            fetched[query] = self._documents_by_id(ranked[:limit], vector_hits.get(query, []))
+        return fetched
+
+    def _documents_by_id(self, doc_ids: List[str], known: List[IngestionDocument]) -> List[IngestionDocument]:
+        """Resolves IDs to documents in the given order, fetching only those not already at hand."""
+        by_id = {doc.doc_id: doc for doc in known}
+        unknown = [doc_id for doc_id in doc_ids if doc_id not in by_id]
+        if unknown:
+            page = self.collection.get(ids=unknown, include=["documents", "metadatas"])
+            for doc_id, content, metadata in zip(page['ids'], page['documents'], page['metadatas']):
+                by_id[doc_id] = IngestionDocument(content=content, metadata=metadata, doc_id=doc_id)
+        return [by_id[doc_id] for doc_id in doc_ids if doc_id in by_id]
 
-    def search(self, query_text: str, limit: int = 3) -> List[IngestionDocument]:
-        results = self.collection.query(query_texts=[query_text], n_results=limit)
+    @staticmethod
+    def _to_documents(results, row: int) -> List[IngestionDocument]:
         # Convert back to our standard IngestionDocument format
         docs = []
         if results['documents']:
-            for i in range(len(results['documents'][0])):
+            for i in range(len(results['documents'][row])):
                 docs.append(IngestionDocument(
-                    content=results['documents'][0][i],
-                    metadata=results['metadatas'][0][i],
-                    doc_id=results['ids'][0][i]
+                    content=results['documents'][row][i],
+                    metadata=results['metadatas'][row][i],
+                    doc_id=results['ids'][row][i]
                 ))
         return docs
@@ -0,0 +1,161 @@
+# src/infrastructure/lexical_index.py
+import math
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from src.tokenization import tokenize
+
+
+def reciprocal_rank_fusion(rankings: Iterable[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Merges ranked ID lists: score(d) = sum over lists of 1 / (k + rank)."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class InvertedIndex:
+    """
+    In-process BM25 index with compact postings.
+
+    Each term maps to two typed arrays (uint32 document ordinals, uint16 term
+    frequencies), i.e. 6 bytes per posting instead of a Python tuple per entry.
+    Ordinals are appended in increasing order, so adding documents is O(terms).
+    Removed or replaced documents are tombstoned; once a quarter of the ordinals
+    are dead the postings are rewritten without them. Until then document
+    frequencies still count tombstoned documents, which only nudges IDF slightly.
+    """
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._doc_ids: List[str] = []
+        self._ordinal_of: Dict[str, int] = {}
+        self._doc_len = array('I')
+        self._alive = bytearray()
+        self._live_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ordinal_of)
+
+    def add(self, doc_id: str, text: str):
+        terms = tokenize(text)
+        counts: Dict[str, int] = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        with self._lock:
+            self._remove_locked(doc_id)
+            ordinal = len(self._doc_ids)
+            self._doc_ids.append(doc_id)
+            self._ordinal_of[doc_id] = ordinal
+            self._doc_len.append(len(terms))
+            self._alive.append(1)
+            self._live_length += len(terms)
+            for term, tf in counts.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = (array('I'), array('H'))
+                postings[0].append(ordinal)
+                postings[1].append(min(tf, 65535))
+            # Re-adding an existing ID (an upsert) tombstones its old ordinal too
+            self._maybe_compact_locked()
+
+    def remove(self, doc_id: str):
+        with self._lock:
+            self._remove_locked(doc_id)
+            self._maybe_compact_locked()
+
+    def _maybe_compact_locked(self):
+        if len(self._doc_ids) > 1000 and len(self._ordinal_of) < 0.75 * len(self._doc_ids):
+            self._compact_locked()
+
+    def _remove_locked(self, doc_id: str):
+        ordinal = self._ordinal_of.pop(doc_id, None)
+        if ordinal is not None:
+            self._alive[ordinal] = 0
+            self._live_length -= self._doc_len[ordinal]
+
+    def _compact_locked(self):
+        live = np.frombuffer(bytes(self._alive), dtype=np.uint8).astype(bool)
+        remap = np.cumsum(live) - 1
+        postings: Dict[str, Tuple[array, array]] = {}
+        for term, (ordinals, tfs) in self._postings.items():
+            ords = np.frombuffer(ordinals, dtype=np.uint32)
+            keep = live[ords]
+            if keep.any():
+                postings[term] = (array('I', remap[ords[keep]].astype(np.uint32).tobytes()),
+                                  array('H', np.frombuffer(tfs, dtype=np.uint16)[keep].tobytes()))
+        self._postings = postings
+        live_rows = np.flatnonzero(live)
+        self._doc_ids = [self._doc_ids[i] for i in live_rows]
+        self._ordinal_of = {doc_id: i for i, doc_id in enumerate(self._doc_ids)}
+        self._doc_len = array('I', np.frombuffer(self._doc_len, dtype=np.uint32)[live_rows].tobytes())
+        self._alive = bytearray(b"\x01" * len(self._doc_ids))
+
+    def clear(self):
+        with self._lock:
+            self._postings = {}
+            self._doc_ids = []
+            self._ordinal_of = {}
+            self._doc_len = array('I')
+            self._alive = bytearray()
+            self._live_length = 0
+
+    def search(self, query_text: str, limit: int = 10, allowed_ids: Optional[Set[str]] = None) -> List[Tuple[str, float]]:
+        """Top-`limit` (doc_id, BM25 score) pairs; documents matching no query term are not returned."""
+        # Scoring runs under the lock: numpy views over the postings must be released
+        # before a writer appends to (and possibly reallocates) the underlying arrays.
+        with self._lock:
+            return self._search_locked(query_text, limit, allowed_ids)
+
+    def _search_locked(self, query_text: str, limit: int, allowed_ids: Optional[Set[str]]) -> List[Tuple[str, float]]:
+        total_docs = len(self._doc_ids)
+        live_docs = len(self._ordinal_of)
+        if live_docs == 0:
+            return []
+        avg_len = self._live_length / live_docs
+        doc_len = np.frombuffer(self._doc_len, dtype=np.uint32)
+
+        all_ordinals, all_scores = [], []
+        for term in set(tokenize(query_text)):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            ordinals = np.frombuffer(postings[0], dtype=np.uint32)
+            tfs = np.frombuffer(postings[1], dtype=np.uint16).astype(np.float32)
+            df = len(ordinals)
+            idf = math.log(1.0 + (total_docs - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * doc_len[ordinals] / avg_len)
+            all_ordinals.append(ordinals)
+            all_scores.append(idf * tfs * (self.k1 + 1.0) / (tfs + norm))
+        if not all_ordinals:
+            return []
+
+        ordinals = np.concatenate(all_ordinals)
+        weights = np.concatenate(all_scores)
+        if len(ordinals) * 8 > total_docs:
+            # Common terms: accumulate into a dense score vector, O(postings + docs)
+            dense = np.bincount(ordinals, weights=weights, minlength=total_docs)
+            unique = np.flatnonzero(dense)
+            scores = dense[unique]
+        else:
+            # Rare terms: stay sparse so cost depends on postings only
+            unique, inverse = np.unique(ordinals, return_inverse=True)
+            scores = np.bincount(inverse, weights=weights)
+        # A view, not a copy: the lock keeps writers from resizing _alive meanwhile
+        keep = np.frombuffer(self._alive, dtype=np.uint8)[unique].astype(bool)
+        if allowed_ids is not None:
+            keep &= np.fromiter((self._doc_ids[o] in allowed_ids for o in unique), dtype=bool, count=len(unique))
+        unique, scores = unique[keep], scores[keep]
+
+        k = min(limit, len(unique))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self._doc_ids[unique[i]], float(scores[i])) for i in top]
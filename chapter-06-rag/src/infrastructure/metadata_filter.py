@@ -0,0 +1,135 @@
+# src/infrastructure/metadata_filter.py
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from src.interfaces import MetadataFilter
+
+# Filters use the Mongo-style operators Chroma understands, one dict per field:
+#   {"parent_id": "LS-2026-X", "type": {"$in": ["damage_photo"]}, "chunk_index": {"$gte": 2, "$lt": 5}}
+# A bare value means equality. All fields must match (logical AND).
+EQUALITY_OPS = ("$eq", "$in")
+RANGE_OPS = ("$gt", "$gte", "$lt", "$lte")
+NEGATIVE_OPS = ("$ne", "$nin")
+SUPPORTED_OPS = EQUALITY_OPS + RANGE_OPS + NEGATIVE_OPS
+
+
+def normalize_filters(filters: Optional[MetadataFilter]) -> List[Tuple[str, str, Any]]:
+    """Flattens a filter dict into (field, op, value) predicates and validates the operators."""
+    predicates = []
+    for field, condition in (filters or {}).items():
+        if isinstance(condition, dict):
+            if not condition:
+                raise ValueError(f"Empty condition for field '{field}'")
+            for op, value in condition.items():
+                if op not in SUPPORTED_OPS:
+                    raise ValueError(f"Unsupported filter operator '{op}' on field '{field}'")
+                if op in ("$in", "$nin") and not isinstance(value, (list, tuple, set)):
+                    raise ValueError(f"'{op}' on field '{field}' needs a list of values")
+                predicates.append((field, op, value))
+        else:
+            predicates.append((field, "$eq", condition))
+    return predicates
+
+
+def filter_cache_key(filters: Optional[MetadataFilter]) -> Tuple:
+    """Hashable, order-independent representation of a filter, for cache keys."""
+    return tuple(sorted(
+        (field, op, tuple(sorted(map(repr, value))) if op in ("$in", "$nin") else repr(value))
+        for field, op, value in normalize_filters(filters)
+    ))
+
+
+def to_chroma_where(filters: Optional[MetadataFilter]) -> Optional[Dict[str, Any]]:
+    """Translates a filter into a Chroma `where` clause (one operator per clause, joined with $and)."""
+    clauses = [{field: {op: list(value) if op in ("$in", "$nin") else value}}
+               for field, op, value in normalize_filters(filters)]
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def _key(value: Any) -> Tuple[bool, Any]:
+    """Postings key; True == 1 in Python, but a boolean field must not match an integer filter."""
+    return isinstance(value, bool), value
+
+
+def _same(value: Any, operand: Any) -> bool:
+    return isinstance(value, bool) == isinstance(operand, bool) and value == operand
+
+
+def _test(value: Any, op: str, operand: Any) -> bool:
+    # Like Chroma, a document without the field matches no predicate on it, not even $ne/$nin
+    if value is None:
+        return False
+    if op == "$eq":
+        return _same(value, operand)
+    if op == "$ne":
+        return not _same(value, operand)
+    if op == "$in":
+        return any(_same(value, v) for v in operand)
+    if op == "$nin":
+        return not any(_same(value, v) for v in operand)
+    if isinstance(value, bool) != isinstance(operand, bool):
+        return False
+    try:
+        if op == "$gt":
+            return value > operand
+        if op == "$gte":
+            return value >= operand
+        if op == "$lt":
+            return value < operand
+        return value <= operand
+    except TypeError:
+        return False
+
+
+class SecondaryIndex:
+    """
+    field -> value -> row set, for backends without native metadata filtering.
+
+    Equality and $in predicates are answered by set lookups, ranges by scanning the
+    distinct values of that field (not the rows), and negative predicates are
+    checked on the already-narrowed candidates. A case-scoped query therefore
+    touches only the rows of that case, however large the collection grows.
+    """
+    def __init__(self):
+        self._postings: Dict[str, Dict[Tuple[bool, Any], Set[int]]] = {}
+        self._all_rows: Set[int] = set()
+
+    def add(self, row: int, metadata: Dict[str, Any]):
+        self._all_rows.add(row)
+        for field, value in metadata.items():
+            if isinstance(value, (str, int, float, bool)):
+                self._postings.setdefault(field, {}).setdefault(_key(value), set()).add(row)
+
+    def remove(self, row: int, metadata: Dict[str, Any]):
+        self._all_rows.discard(row)
+        for field, value in metadata.items():
+            rows = self._postings.get(field, {}).get(_key(value))
+            if rows is not None:
+                rows.discard(row)
+                if not rows:
+                    del self._postings[field][_key(value)]
+
+    def _rows_for(self, field: str, op: str, operand: Any) -> Set[int]:
+        values = self._postings.get(field, {})
+        if op == "$eq":
+            return values.get(_key(operand), set())
+        if op == "$in":
+            return set().union(*(values.get(_key(v), ()) for v in operand))
+        return set().union(*(rows for (_, value), rows in values.items() if _test(value, op, operand)))
+
+    def lookup(self, filters: Optional[MetadataFilter], metadata_of) -> Set[int]:
+        """Rows matching the filter; metadata_of(row) is only called for negative predicates."""
+        predicates = normalize_filters(filters)
+        positive = [p for p in predicates if p[1] not in NEGATIVE_OPS]
+        negative = [p for p in predicates if p[1] in NEGATIVE_OPS]
+
+        # Start from the most selective positive predicate
+        candidate_sets = sorted((self._rows_for(*p) for p in positive), key=len)
+        rows = set(candidate_sets[0]) if candidate_sets else set(self._all_rows)
+        for other in candidate_sets[1:]:
+            rows &= other
+        if negative:
+            rows = {row for row in rows
+                    if all(_test(metadata_of(row).get(field), op, operand) for field, op, operand in negative)}
+        return rows
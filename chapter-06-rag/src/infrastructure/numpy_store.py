@@ -0,0 +1,341 @@
+# src/infrastructure/numpy_store.py
+import json
+import os
+import shutil
+import sys
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.interfaces import VectorStoreInterface, IngestionDocument, MetadataFilter
+from src.infrastructure.metadata_filter import SecondaryIndex
+
+
+class NumpyVectorStore(VectorStoreInterface):
+    """
+    Flat, exact vector store with no server, no SQLite and no serialization on the query path.
+
+    On-disk layout (one directory per collection):
+      vectors.f32   - raw, L2-normalized float32 rows, memory-mapped on open, append-only
+      records.jsonl - sidecar log of add/delete/update operations (ids, text, metadata)
+      meta.json     - embedding dimension and file generation; compact() writes
+                      vectors.<n>.f32 / records.<n>.jsonl and switches to them here
+
+    Search is one matrix multiply (cosine similarity, since rows are normalized)
+    followed by argpartition for the top-k. Deletes and re-upserts leave dead rows
+    behind until compact() rewrites the file.
+
+    There is no native metadata filtering, so an in-memory SecondaryIndex maps
+    metadata values to rows; filtered searches only score the matching rows.
+    """
+    def __init__(self, collection_name: str, persist_path: str = "./.numpystore", embedding_function=None):
+        if embedding_function is None:
+            # Same local default as the Chroma store, imported lazily so numpy-only setups still work
+            from chromadb.utils import embedding_functions
+            embedding_function = embedding_functions.DefaultEmbeddingFunction()
+        self.embedding_function = embedding_function
+        self.collection_name = collection_name
+        self.path = os.path.join(persist_path, collection_name)
+        self._meta_path = os.path.join(self.path, "meta.json")
+        self._lock = threading.Lock()
+        self._load()
+
+    # --- Persistence ---
+
+    def _load(self):
+        os.makedirs(self.path, exist_ok=True)
+        self.dim: Optional[int] = None
+        self._generation = 0
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            self.dim, self._generation = meta["dim"], meta.get("generation", 0)
+        self._vectors_path, self._records_path = self._data_paths(self._generation)
+
+        self._ids: List[str] = []
+        self._contents: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._row_of: Dict[str, int] = {}
+        self._secondary = SecondaryIndex()
+        alive: List[bool] = []
+
+        file_rows = 0
+        if self.dim and os.path.exists(self._vectors_path):
+            file_rows = os.path.getsize(self._vectors_path) // (4 * self.dim)
+
+        if os.path.exists(self._records_path):
+            with open(self._records_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    op = record["op"]
+                    if op == "add":
+                        # Rows whose vector never made it to disk (crash mid-append) are ignored
+                        if record["row"] != len(self._ids) or record["row"] >= file_rows:
+                            break
+                        self._mark_dead(alive, record["id"])
+                        self._row_of[record["id"]] = len(self._ids)
+                        self._ids.append(record["id"])
+                        self._contents.append(record["content"])
+                        self._metadatas.append(record["metadata"])
+                        self._secondary.add(len(self._ids) - 1, record["metadata"])
+                        alive.append(True)
+                    elif op == "delete":
+                        self._mark_dead(alive, record["id"])
+                    elif op == "update" and record["id"] in self._row_of:
+                        self._set_metadata(self._row_of[record["id"]], record["metadata"])
+
+        self._alive = np.array(alive, dtype=bool)
+        self._remap(len(self._ids))
+
+    def _data_paths(self, generation: int):
+        suffix = f".{generation}" if generation else ""
+        return (os.path.join(self.path, f"vectors{suffix}.f32"),
+                os.path.join(self.path, f"records{suffix}.jsonl"))
+
+    def _write_meta(self, generation: int):
+        """meta.json is read first on open, so replacing it atomically switches generations."""
+        tmp_meta = self._meta_path + ".tmp"
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "generation": generation}, f)
+        os.replace(tmp_meta, self._meta_path)
+
+    def _mark_dead(self, alive, doc_id: str):
+        row = self._row_of.pop(doc_id, None)
+        if row is not None:
+            alive[row] = False
+            self._secondary.remove(row, self._metadatas[row])
+
+    def _set_metadata(self, row: int, metadata: Dict[str, Any]):
+        self._secondary.remove(row, self._metadatas[row])
+        self._metadatas[row] = metadata
+        self._secondary.add(row, metadata)
+
+    def _remap(self, rows: int):
+        """(Re)opens the vector file as a read-only memmap covering `rows` rows."""
+        if rows and self.dim:
+            self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+        else:
+            self._vectors = np.zeros((0, self.dim or 0), dtype=np.float32)
+
+    def _append_records(self, records: List[Dict[str, Any]]):
+        # Serialized up front, and cut back on a failed write, so the log never ends mid-record
+        lines = "".join(json.dumps(record) + "\n" for record in records)
+        with open(self._records_path, "a", encoding="utf-8") as f:
+            end = f.tell()
+            try:
+                f.write(lines)
+                f.flush()
+            except BaseException:
+                f.truncate(end)
+                raise
+
+    def reset(self):
+        """Clears all data in the collection."""
+        with self._lock:
+            self._vectors = None  # Release the memmap before removing the file
+            shutil.rmtree(self.path, ignore_errors=True)
+            self._load()
+
+    def compact(self):
+        """
+        Rewrites the vector file and sidecar without dead rows.
+
+        The new pair is written under the next generation's names and only then made
+        current by replacing meta.json, so a crash at any point leaves one complete,
+        consistent generation on disk.
+        """
+        with self._lock:
+            if self.dim is None:
+                return  # Nothing was ever written
+            live_rows = np.flatnonzero(self._alive)
+            generation = self._generation + 1
+            new_vectors, new_records = self._data_paths(generation)
+            with open(new_vectors, "wb") as f:
+                for start in range(0, len(live_rows), 65536):
+                    f.write(np.ascontiguousarray(self._vectors[live_rows[start:start + 65536]]).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(new_records, "w", encoding="utf-8") as f:
+                for new_row, row in enumerate(live_rows):
+                    f.write(json.dumps({
+                        "op": "add", "row": new_row, "id": self._ids[row],
+                        "content": self._contents[row], "metadata": self._metadatas[row],
+                    }) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._vectors = None  # Release the memmap before removing the file
+            old_paths = (self._vectors_path, self._records_path)
+            self._write_meta(generation)
+            for path in old_paths:
+                if os.path.exists(path):
+                    os.remove(path)
+            self._load()
+
+    # --- Writes ---
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """L2-normalized float32 embeddings, the same form the store keeps on disk."""
+        vectors = np.asarray(self.embedding_function(texts), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def add_documents(self, documents: List[IngestionDocument]) -> bool:
+        if not documents:
+            return True
+        try:
+            vectors = self.embed([doc.content for doc in documents])
+            with self._lock:
+                if self.dim is None:
+                    self.dim = int(vectors.shape[1])
+                    self._write_meta(self._generation)
+                elif vectors.shape[1] != self.dim:
+                    raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match store dimension {self.dim}")
+
+                first_row = len(self._ids)
+                records = [{"op": "add", "row": row, "id": doc.doc_id, "content": doc.content, "metadata": doc.metadata}
+                           for row, doc in enumerate(documents, start=first_row)]
+
+                # Append-only: vectors first, then the records that make them visible
+                with open(self._vectors_path, "ab") as f:
+                    # Drop orphan rows left by an earlier failed append so rows stay aligned
+                    f.truncate(first_row * 4 * self.dim)
+                    f.write(vectors.tobytes())
+                self._append_records(records)
+
+                # Both files are written: only now does the in-memory state change
+                alive = np.concatenate([self._alive, np.ones(len(documents), dtype=bool)])
+                for row, doc in enumerate(documents, start=first_row):
+                    self._mark_dead(alive, doc.doc_id)
+                    self._row_of[doc.doc_id] = row
+                    self._ids.append(doc.doc_id)
+                    self._contents.append(doc.content)
+                    self._metadatas.append(doc.metadata)
+                    self._secondary.add(row, doc.metadata)
+                self._alive = alive
+                self._remap(len(self._ids))
+            return True
+        except Exception as e:
+            print(f"NumpyStore Error: {e}")
+            return False
+
+    def delete_documents(self, doc_ids: List[str]) -> bool:
+        with self._lock:
+            known = [doc_id for doc_id in doc_ids if doc_id in self._row_of]
+            for doc_id in known:
+                self._mark_dead(self._alive, doc_id)
+            self._append_records([{"op": "delete", "id": doc_id} for doc_id in known])
+        return True
+
+    def update_metadata(self, doc_ids: List[str], metadatas: List[Dict[str, Any]]) -> bool:
+        with self._lock:
+            records = []
+            for doc_id, metadata in zip(doc_ids, metadatas):
+                if doc_id in self._row_of:
+                    self._set_metadata(self._row_of[doc_id], metadata)
+                    records.append({"op": "update", "id": doc_id, "metadata": metadata})
+            self._append_records(records)
+        return True
+
+    # --- Reads ---
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def count(self) -> int:
+        return len(self._row_of)
+
+    @property
+    def row_count(self) -> int:
+        """Rows in the vector file, including dead ones."""
+        return len(self._ids)
+
+    def resident_bytes_per_row(self, sample_size: int = 1000) -> float:
+        """Estimated RAM per row for ids, texts and metadata (kept in memory, unlike the vectors)."""
+        if not self._ids:
+            return 0.0
+        rows = np.linspace(0, len(self._ids) - 1, num=min(sample_size, len(self._ids))).astype(np.int64)
+        total = 0
+        for row in rows:
+            metadata = self._metadatas[row] or {}
+            total += sys.getsizeof(self._ids[row]) + sys.getsizeof(self._contents[row]) + sys.getsizeof(metadata)
+            total += sum(sys.getsizeof(value) for value in metadata.values())
+        # Plus one slot per row in each of the three lists
+        return total / len(rows) + 3 * 8
+
+    @property
+    def live_mask(self) -> np.ndarray:
+        return self._alive
+
+    def vectors_for_rows(self, rows) -> np.ndarray:
+        """Reads the given rows from the memmap (only those pages are touched)."""
+        return np.asarray(self._vectors[np.asarray(rows, dtype=np.int64)])
+
+    def documents_for_rows(self, rows) -> List[IngestionDocument]:
+        return [
+            IngestionDocument(
+                content=self._contents[row],
+                metadata=self._metadatas[row],
+                doc_id=self._ids[row]
+            )
+            for row in rows
+        ]
+
+    def filtered_rows(self, filters: Optional[MetadataFilter]) -> np.ndarray:
+        """Sorted live rows whose metadata matches `filters`, answered from the secondary index."""
+        with self._lock:
+            rows = self._secondary.lookup(filters, lambda row: self._metadatas[row])
+            return np.fromiter(sorted(rows), dtype=np.int64, count=len(rows))
+
+    def search(
+        self, query_text: str, limit: int = 3, filters: Optional[MetadataFilter] = None
+    ) -> List[IngestionDocument]:
+        return self.search_many([query_text], limit=limit, filters=filters)[0]
+
+    def search_many(
+        self,
+        queries: List[str],
+        limit: int = 3,
+        filters: Optional[MetadataFilter] = None,
+        *,
+        batch_size: int = 256,
+    ) -> List[List[IngestionDocument]]:
+        results: List[List[IngestionDocument]] = []
+        for i in range(0, len(queries), batch_size):
+            query_vectors = self.embed(list(queries[i:i + batch_size]))
+            results.extend(self.search_by_vectors(query_vectors, limit=limit, filters=filters))
+        return results
+
+    def search_by_vectors(
+        self, query_vectors: np.ndarray, limit: int = 3, filters: Optional[MetadataFilter] = None
+    ) -> List[List[IngestionDocument]]:
+        """Exact top-k for pre-normalized query vectors: one matmul + argpartition."""
+        query_vectors = np.asarray(query_vectors, dtype=np.float32)
+        if limit <= 0 or not self._row_of:
+            return [[] for _ in range(len(query_vectors))]
+        if filters:
+            # Only the matching rows are read from the memmap and scored
+            rows = self.filtered_rows(filters)
+            if len(rows) == 0:
+                return [[] for _ in range(len(query_vectors))]
+            return self._top_k(query_vectors @ self.vectors_for_rows(rows).T, rows, limit)
+
+        vectors, alive = self._vectors, self._alive
+        scores = query_vectors @ vectors.T
+        if not alive.all():
+            scores[:, ~alive] = -np.inf
+        return self._top_k(scores, None, limit, live=int(alive.sum()))
+
+    def _top_k(self, scores: np.ndarray, rows: Optional[np.ndarray], limit: int, live: Optional[int] = None):
+        """rows maps score columns back to store rows (None: columns are rows)."""
+        k = min(limit, scores.shape[1] if live is None else live)
+        if k <= 0:
+            return [[] for _ in range(len(scores))]
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row_scores, candidates in zip(scores, top):
+            ordered = candidates[np.argsort(-row_scores[candidates])]
+            results.append(self.documents_for_rows(ordered if rows is None else rows[ordered]))
+        return results
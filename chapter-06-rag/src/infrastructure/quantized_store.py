@@ -0,0 +1,300 @@
+# src/infrastructure/quantized_store.py
+import os
+from typing import Any, Dict, List, Literal, Optional
+
+import numpy as np
+
+from src.interfaces import VectorStoreInterface, IngestionDocument, MetadataFilter
+from src.infrastructure.numpy_store import NumpyVectorStore
+
+Quantization = Literal['sq8', 'pq']
+
+
+def _kmeans(data: np.ndarray, k: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Plain Lloyd's k-means (L2). Good enough for coarse lists and PQ codebooks."""
+    rng = np.random.default_rng(seed)
+    k = min(k, len(data))
+    centroids = data[rng.choice(len(data), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = _assign(data, centroids)
+        counts = np.bincount(assignment, minlength=k)
+        sums = np.stack([np.bincount(assignment, weights=data[:, d], minlength=k)
+                         for d in range(data.shape[1])], axis=1)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+        # Empty clusters are re-seeded from random points
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            centroids[empty] = data[rng.integers(len(data), size=len(empty))]
+    return centroids
+
+
+def _assign(data: np.ndarray, centroids: np.ndarray, chunk: int = 16384) -> np.ndarray:
+    """Nearest centroid (L2) for every row, computed in chunks to bound memory."""
+    centroid_norms = (centroids ** 2).sum(axis=1)
+    out = np.empty(len(data), dtype=np.int32)
+    for start in range(0, len(data), chunk):
+        block = data[start:start + chunk]
+        distances = centroid_norms[None, :] - 2.0 * (block @ centroids.T)
+        out[start:start + chunk] = distances.argmin(axis=1)
+    return out
+
+
+class QuantizedVectorStore(VectorStoreInterface):
+    """
+    Compressed IVF index for collections whose float32 vectors do not fit in RAM.
+
+    Vectors are routed to one of `nlist` coarse lists (k-means centroids) and stored
+    compressed, either as int8 scalar quantization ('sq8', d bytes per vector) or as
+    product quantization of the residual to the list centroid ('pq', pq_subvectors
+    bytes per vector). A query scans only
+    the `nprobe` closest lists and, optionally, re-ranks its best `rerank` candidates
+    with exact scores read from the full-precision memmap of the underlying
+    NumpyVectorStore, which stays on disk rather than in RAM.
+
+    Only the vectors are compressed: the base store still keeps every row's id,
+    text and metadata in memory (see NumpyVectorStore.resident_bytes_per_row()),
+    which for chunked documents usually outweighs the codes.
+
+    The index has to be trained once enough vectors exist (train()); until then
+    searches fall back to exact search. train() and save() write the index next to
+    the base store; on open it is re-loaded and any rows added since are encoded.
+    NumpyVectorStore.compact() renumbers rows, so retrain after compacting the base.
+
+    Metadata filters are resolved by the base store's secondary index. Scopes of
+    up to `filter_exact_threshold` rows are searched exactly over just those rows;
+    larger ones go through the IVF index with the out-of-scope rows masked.
+    """
+    def __init__(
+        self,
+        base: NumpyVectorStore,
+        quantization: Quantization = 'sq8',
+        nlist: int = 256,
+        nprobe: int = 8,
+        rerank: int = 0,
+        pq_subvectors: int = 16,
+        filter_exact_threshold: int = 20000,
+    ):
+        if quantization not in ('sq8', 'pq'):
+            raise ValueError(f"Unknown quantization: {quantization}")
+        self.base = base
+        self.quantization = quantization
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.rerank = rerank
+        self.pq_subvectors = pq_subvectors
+        self.filter_exact_threshold = filter_exact_threshold
+        label = 'sq8' if quantization == 'sq8' else f"pq{pq_subvectors}"
+        self._index_path = os.path.join(base.path, f"ivf_{label}_{nlist}.npz")
+        self._clear()
+        if os.path.exists(self._index_path):
+            self._load_index()
+            self._encode_new_rows()
+
+    def _clear(self):
+        self.trained = False
+        self._centroids: Optional[np.ndarray] = None
+        self._sq_min: Optional[np.ndarray] = None
+        self._sq_step: Optional[np.ndarray] = None
+        self._codebooks: Optional[np.ndarray] = None
+        self._list_rows: List[np.ndarray] = []
+        self._list_codes: List[np.ndarray] = []
+        self._indexed_rows = 0
+
+    # --- Training and encoding ---
+
+    def train(self, sample_size: int = 50000, iterations: int = 10, seed: int = 0, pq_sample_size: int = 16384):
+        """Learns coarse centroids and quantizer parameters from the stored vectors, then encodes them all."""
+        live_rows = np.flatnonzero(self.base.live_mask)
+        if len(live_rows) == 0:
+            raise ValueError("Cannot train a quantized index on an empty store.")
+        rng = np.random.default_rng(seed)
+        sample_rows = np.sort(rng.choice(live_rows, size=min(sample_size, len(live_rows)), replace=False))
+        sample = self.base.vectors_for_rows(sample_rows).astype(np.float32)
+        dim = sample.shape[1]
+
+        self._clear()
+        self._centroids = _kmeans(sample, self.nlist, iterations, seed)
+
+        if self.quantization == 'sq8':
+            self._sq_min = sample.min(axis=0)
+            self._sq_step = np.maximum(sample.max(axis=0) - self._sq_min, 1e-6) / 255.0
+        else:
+            if dim % self.pq_subvectors:
+                raise ValueError(f"Dimension {dim} is not divisible by pq_subvectors={self.pq_subvectors}")
+            sub = dim // self.pq_subvectors
+            # 256 centroids per subspace need far fewer points than the coarse quantizer
+            pq_sample = sample[:pq_sample_size]
+            residuals = pq_sample - self._centroids[_assign(pq_sample, self._centroids)]
+            self._codebooks = np.stack([
+                _kmeans(residuals[:, j * sub:(j + 1) * sub], 256, iterations, seed + j)
+                for j in range(self.pq_subvectors)
+            ])
+
+        self._list_rows = [np.empty(0, dtype=np.int32) for _ in range(len(self._centroids))]
+        code_width = dim if self.quantization == 'sq8' else self.pq_subvectors
+        code_dtype = np.int8 if self.quantization == 'sq8' else np.uint8
+        self._list_codes = [np.empty((0, code_width), dtype=code_dtype) for _ in range(len(self._centroids))]
+        self.trained = True
+        self._encode_new_rows()
+        self.save()
+
+    def _encode(self, vectors: np.ndarray, lists: np.ndarray) -> np.ndarray:
+        if self.quantization == 'sq8':
+            levels = np.rint((vectors - self._sq_min) / self._sq_step)
+            return (np.clip(levels, 0, 255) - 128).astype(np.int8)
+        residuals = vectors - self._centroids[lists]
+        sub = vectors.shape[1] // self.pq_subvectors
+        return np.stack([
+            _assign(residuals[:, j * sub:(j + 1) * sub], self._codebooks[j])
+            for j in range(self.pq_subvectors)
+        ], axis=1).astype(np.uint8)
+
+    def _encode_new_rows(self, chunk: int = 65536):
+        """Adds every base row not yet in the index to its inverted list."""
+        if not self.trained:
+            return
+        total = self.base.row_count
+        for start in range(self._indexed_rows, total, chunk):
+            rows = np.arange(start, min(start + chunk, total), dtype=np.int32)
+            vectors = self.base.vectors_for_rows(rows)
+            lists = _assign(vectors, self._centroids)
+            codes = self._encode(vectors, lists)
+            for list_id in np.unique(lists):
+                members = lists == list_id
+                self._list_rows[list_id] = np.concatenate([self._list_rows[list_id], rows[members]])
+                self._list_codes[list_id] = np.concatenate([self._list_codes[list_id], codes[members]])
+        self._indexed_rows = total
+
+    def save(self):
+        """Persists the trained index; rows added after the last save are re-encoded on open."""
+        if not self.trained:
+            return
+        arrays: Dict[str, Any] = {
+            "centroids": self._centroids,
+            "indexed_rows": np.array(self._indexed_rows),
+            "list_sizes": np.array([len(rows) for rows in self._list_rows]),
+            "rows": np.concatenate(self._list_rows),
+            "codes": np.concatenate(self._list_codes),
+        }
+        if self.quantization == 'sq8':
+            arrays.update(sq_min=self._sq_min, sq_step=self._sq_step)
+        else:
+            arrays.update(codebooks=self._codebooks)
+        tmp_path = self._index_path + ".tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, self._index_path)
+
+    def _load_index(self):
+        with np.load(self._index_path) as data:
+            self._centroids = data["centroids"]
+            self._indexed_rows = int(data["indexed_rows"])
+            boundaries = np.cumsum(data["list_sizes"])[:-1]
+            self._list_rows = np.split(data["rows"], boundaries)
+            self._list_codes = np.split(data["codes"], boundaries)
+            if self.quantization == 'sq8':
+                self._sq_min, self._sq_step = data["sq_min"], data["sq_step"]
+            else:
+                self._codebooks = data["codebooks"]
+        self.trained = True
+
+    def memory_bytes_per_vector(self) -> float:
+        """
+        Resident index bytes per vector (codes + row ids), excluding the shared centroids.
+        The base store's in-memory texts and metadata come on top of this.
+        """
+        code_bytes = self._list_codes[0].shape[1] if self._list_codes else 0
+        return code_bytes + np.dtype(np.int32).itemsize
+
+    # --- VectorStoreInterface ---
+
+    def count(self) -> int:
+        return self.base.count()
+
+    def reset(self):
+        self.base.reset()
+        self._clear()
+        if os.path.exists(self._index_path):
+            os.remove(self._index_path)
+
+    def add_documents(self, documents: List[IngestionDocument]) -> bool:
+        if not self.base.add_documents(documents):
+            return False
+        self._encode_new_rows()
+        return True
+
+    def delete_documents(self, doc_ids: List[str]) -> bool:
+        # Dead rows stay in the lists and are masked out at query time
+        return self.base.delete_documents(doc_ids)
+
+    def update_metadata(self, doc_ids: List[str], metadatas: List[Dict[str, Any]]) -> bool:
+        return self.base.update_metadata(doc_ids, metadatas)
+
+    def search(
+        self, query_text: str, limit: int = 3, filters: Optional[MetadataFilter] = None
+    ) -> List[IngestionDocument]:
+        return self.search_many([query_text], limit=limit, filters=filters)[0]
+
+    def search_many(
+        self, queries: List[str], limit: int = 3, filters: Optional[MetadataFilter] = None
+    ) -> List[List[IngestionDocument]]:
+        return self.search_by_vectors(self.base.embed(list(queries)), limit=limit, filters=filters)
+
+    def search_by_vectors(
+        self,
+        query_vectors: np.ndarray,
+        limit: int = 3,
+        nprobe: Optional[int] = None,
+        rerank: Optional[int] = None,
+        filters: Optional[MetadataFilter] = None,
+    ) -> List[List[IngestionDocument]]:
+        if not self.trained:
+            return self.base.search_by_vectors(query_vectors, limit=limit, filters=filters)
+        nprobe = min(nprobe or self.nprobe, len(self._centroids))
+        rerank = self.rerank if rerank is None else rerank
+        alive = self.base.live_mask
+        if filters:
+            scope = self.base.filtered_rows(filters)
+            if len(scope) <= self.filter_exact_threshold:
+                return self.base.search_by_vectors(query_vectors, limit=limit, filters=filters)
+            alive = np.zeros(len(alive), dtype=bool)
+            alive[scope] = True
+
+        results = []
+        coarse = np.asarray(query_vectors, dtype=np.float32) @ self._centroids.T
+        for query, list_scores in zip(query_vectors, coarse):
+            probed = np.argpartition(-list_scores, nprobe - 1)[:nprobe]
+            rows = np.concatenate([self._list_rows[l] for l in probed])
+            if len(rows) == 0:
+                results.append([])
+                continue
+            codes = np.concatenate([self._list_codes[l] for l in probed])
+            list_of_row = np.repeat(probed, [len(self._list_rows[l]) for l in probed])
+            scores = self._approximate_scores(query, codes, list_scores[list_of_row])
+            scores[~alive[rows]] = -np.inf
+
+            keep = min(max(limit, rerank), int(np.isfinite(scores).sum()))
+            if keep <= 0:
+                results.append([])
+                continue
+            candidates = np.argpartition(-scores, keep - 1)[:keep]
+            candidate_rows = rows[candidates]
+            if rerank:
+                # Exact re-ranking only reads the candidate rows from the on-disk memmap
+                candidate_scores = self.base.vectors_for_rows(candidate_rows) @ query
+            else:
+                candidate_scores = scores[candidates]
+            ordered = candidate_rows[np.argsort(-candidate_scores)[:limit]]
+            results.append(self.base.documents_for_rows(ordered))
+        return results
+
+    def _approximate_scores(self, query: np.ndarray, codes: np.ndarray, centroid_scores: np.ndarray) -> np.ndarray:
+        if self.quantization == 'sq8':
+            # q . (min + step * (code + 128)) split into a constant and one int8 matmul
+            weighted = query * self._sq_step
+            constant = float(query @ self._sq_min) + 128.0 * float(weighted.sum())
+            return codes.astype(np.float32) @ weighted + constant
+        # PQ asymmetric distance: q . centroid + one lookup table per subvector, gather + sum
+        sub = len(query) // self.pq_subvectors
+        tables = np.einsum('jcs,js->jc', self._codebooks, query.reshape(self.pq_subvectors, sub))
+        return centroid_scores + tables[np.arange(self.pq_subvectors)[None, :], codes].sum(axis=1)
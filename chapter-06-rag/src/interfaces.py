@@ -1,6 +1,10 @@
 from abc import ABC, abstractmethod
 from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+# Structured metadata filter, e.g. {"parent_id": "LS-2026-X", "chunk_index": {"$gte": 2}}
+# Supported operators: $eq, $ne, $in, $nin, $gt, $gte, $lt, $lte (all fields are ANDed)
+MetadataFilter = Dict[str, Any]
 
 @dataclass
 class IngestionDocument:
@@ -9,6 +13,29 @@ class IngestionDocument:
     metadata: Dict[str, Any]
     doc_id: Optional[str] = None
 
+@dataclass
+class BatchFailure:
+    """A single batch that could not be embedded or stored."""
+    batch_index: int
+    doc_ids: List[Optional[str]]
+    error: str
+
+@dataclass
+class BulkIngestionReport:
+    """Outcome of a batched bulk ingestion run."""
+    total_documents: int
+    stored_documents: int = 0
+    failed_batches: List[BatchFailure] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+
+    @property
+    def success(self) -> bool:
+        return not self.failed_batches
+
+    @property
+    def docs_per_second(self) -> float:
+        return self.stored_documents / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
 class VectorStoreInterface(ABC):
     """Abstract Base Class for any Vector Database wrapper."""
     
@@ -18,6 +45,31 @@ class VectorStoreInterface(ABC):
         pass
 
     @abstractmethod
-    def search(self, query_text: str, limit: int = 3) -> List[IngestionDocument]:
-        """Performs semantic search."""
+    def delete_documents(self, doc_ids: List[str]) -> bool:
+        """Removes documents by ID. Unknown IDs are ignored."""
         pass
+
+    @abstractmethod
+    def update_metadata(self, doc_ids: List[str], metadatas: List[Dict[str, Any]]) -> bool:
+        """Replaces the metadata of stored documents without re-embedding them."""
+        pass
+
+    @abstractmethod
+    def search(
+        self, query_text: str, limit: int = 3, filters: Optional[MetadataFilter] = None
+    ) -> List[IngestionDocument]:
+        """Performs semantic search, restricted to documents whose metadata matches `filters`."""
+        pass
+
+    def search_many(
+        self, queries: List[str], limit: int = 3, filters: Optional[MetadataFilter] = None
+    ) -> List[List[IngestionDocument]]:
+        """
+        Runs several searches at once; results come back in the order of `queries`.
+        Backends that can batch query embedding should override this loop.
+        """
+        return [self.search(query, limit=limit, filters=filters) for query in queries]
+
+    def count(self) -> Optional[int]:
+        """Number of stored documents, or None if the backend cannot tell cheaply."""
+        return None
@@ -1,15 +1,17 @@
 from src.infrastructure.chroma_store import ChromaVectorStore
 from src.services.text_ingestion import TextIngestionService
+from src.services.ingestion_manifest import IngestionManifest
 
 def run_production_ingestion():
     # 1. Initialize Infrastructure (The 'Database')
     vector_db = ChromaVectorStore(collection_name="logismart_policies")
-    
-    # Reset DB to avoid duplicates in lab
-    vector_db.reset() 
+
+    # Content-addressed chunk IDs + a manifest mean re-runs only embed what changed,
+    # so there is no need to reset the DB to avoid duplicates
+    manifest = IngestionManifest("./.chromadb/logismart_policies_manifest.json")
 
     # 2. Initialize Service (The 'Logic')
-    ingestion_service = TextIngestionService(vector_store=vector_db)
+    ingestion_service = TextIngestionService(vector_store=vector_db, manifest=manifest)
     
     # 3. Execute Business Logic
     sample_policy = """
@@ -41,8 +41,8 @@ def run_real_lab():
     user_question = "What evidence of damage do we have?"
     print(f"\n👤 User Question: '{user_question}'")
     
-    # A. Retrieve
-    results = vector_db.search("damage", limit=3)
+    # A. Retrieve (scoped to this shipment, so other cases cannot crowd out its evidence)
+    results = vector_db.search("damage", limit=3, filters={"parent_id": case.shipment_id})
     
     # B. Generate
     answer = llm.generate_answer(user_question, results)
@@ -1,5 +1,5 @@
 # src/models.py
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List, Literal, Dict, Any
 
 @dataclass
@@ -15,3 +15,32 @@ class ShipmentCase:
     shipment_id: str
     customer_id: str
     artifacts: List[ShipmentArtifact]
+
+
+@dataclass
+class CaseIngestionReport:
+    """Outcome of a bulk multimodal ingestion run."""
+    total_cases: int
+    stored_documents: int = 0
+    skipped_duplicates: int = 0
+    missing_files: int = 0
+    failed_artifacts: int = 0  # Files that exist but could not be read
+    failed_documents: int = 0
+    elapsed_seconds: float = 0.0
+    # Per artifact type: how many were processed and the time spent reading them
+    artifact_counts: Dict[str, int] = field(default_factory=dict)
+    artifact_seconds: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def success(self) -> bool:
+        return self.failed_documents == 0 and self.failed_artifacts == 0
+
+    @property
+    def cases_per_second(self) -> float:
+        return self.total_cases / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+    def avg_ms_per_artifact(self) -> Dict[str, float]:
+        return {
+            artifact_type: 1000.0 * self.artifact_seconds[artifact_type] / count
+            for artifact_type, count in self.artifact_counts.items() if count
+        }
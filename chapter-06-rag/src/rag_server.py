@@ -0,0 +1,153 @@
+# src/rag_server.py
+# Run from chapter-06-rag:  python -m src.rag_server --port 8765   (or --unix /tmp/logismart_rag.sock)
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, Optional
+
+from src import simple_rag
+
+class RagQueryServer:
+    """
+    Resident query service: the Chroma client and the embedding model are loaded once,
+    then every request is served warm.
+
+    Protocol: one JSON object per line in each direction, over TCP or a Unix socket.
+      -> {"id": 1, "op": "retrieve", "question": "What is the speed limit?", "limit": 4}
+      <- {"id": 1, "ok": true, "context": "...", "documents": [...], "elapsed_ms": 3.1}
+    Ops: "retrieve" (assembled context only), "ask" (context + LLM answer), "ping".
+    The blocking Chroma/OpenAI calls run in worker threads, at most `max_concurrency` at once,
+    so one connection waiting on the LLM does not hold up the others. A client may also
+    pipeline requests on one connection: up to `max_pipelined` of them run concurrently,
+    and the responses are written back in request order.
+    """
+    def __init__(self, max_concurrency: int = 8, max_pipelined: int = 32):
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self.max_pipelined = max_pipelined
+        self.startup_seconds: Optional[float] = None
+        self.served = 0
+
+    def preload(self):
+        """Cold start, paid once: opens the store and loads the embedding model."""
+        start = time.perf_counter()
+        simple_rag.warm_up()
+        self.startup_seconds = time.perf_counter() - start
+
+    async def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get("op")
+        response: Dict[str, Any] = {"id": request.get("id")}
+        if op == "ping":
+            return {**response, "ok": True, "startup_seconds": self.startup_seconds, "served": self.served}
+        question = request.get("question")
+        if op not in ("retrieve", "ask") or not isinstance(question, str) or not question.strip():
+            return {**response, "ok": False, "error": "Expected op 'retrieve', 'ask' or 'ping' and a non-empty 'question'."}
+
+        start = time.perf_counter()
+        try:
+            async with self._slots:
+                assembled = await asyncio.to_thread(simple_rag.retrieve, question, int(request.get("limit", 4)))
+                response.update({
+                    "ok": True,
+                    "context": assembled.text,
+                    "documents": [{"id": doc.doc_id, "metadata": doc.metadata} for doc in assembled.documents],
+                    "context_tokens": assembled.context_tokens,
+                    "tokens_saved": assembled.tokens_saved,
+                })
+                if op == "ask":
+                    response["answer"] = await asyncio.to_thread(simple_rag.generate, question, assembled.text)
+        except Exception as e:
+            response = {"id": request.get("id"), "ok": False, "error": str(e)}
+        response["elapsed_ms"] = 1000 * (time.perf_counter() - start)
+        self.served += 1
+        return response
+
+    async def _respond(self, line: bytes) -> Dict[str, Any]:
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            return {"ok": False, "error": f"Invalid JSON: {e}"}
+        return await self.handle(request if isinstance(request, dict) else {})
+
+    async def _answer(self, line: bytes, previous: Optional[asyncio.Task], writer: asyncio.StreamWriter,
+                      in_flight: asyncio.Semaphore) -> bool:
+        """Serves one pipelined request; False once the connection is gone."""
+        try:
+            response = await self._respond(line)
+            # The response to the request before this one goes out first
+            if previous is not None and not await previous:
+                return False
+            writer.write((json.dumps(response) + "\n").encode("utf-8"))
+            await writer.drain()
+            return True
+        except ConnectionError:
+            return False
+        finally:
+            in_flight.release()
+
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        in_flight = asyncio.Semaphore(self.max_pipelined)
+        last: Optional[asyncio.Task] = None
+        try:
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                await in_flight.acquire()
+                last = asyncio.create_task(self._answer(line, last, writer, in_flight))
+            if last is not None:
+                await last
+        except ConnectionError:
+            pass
+        finally:
+            if last is not None and not last.done():
+                last.cancel()
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765, unix_path: Optional[str] = None):
+        if self.startup_seconds is None:
+            await asyncio.to_thread(self.preload)
+        if unix_path:
+            server = await asyncio.start_unix_server(self._serve_client, path=unix_path)
+            where = unix_path
+        else:
+            server = await asyncio.start_server(self._serve_client, host=host, port=port)
+            where = f"{host}:{port}"
+        print(f"🚀 RAG query service ready on {where} (cold start {self.startup_seconds:.2f}s)", flush=True)
+        async with server:
+            await server.serve_forever()
+
+async def query_service(
+    request: Dict[str, Any], host: str = "127.0.0.1", port: int = 8765, unix_path: Optional[str] = None
+) -> Dict[str, Any]:
+    """One-shot client: sends a single request and returns the decoded response."""
+    if unix_path:
+        reader, writer = await asyncio.open_unix_connection(unix_path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write((json.dumps(request) + "\n").encode("utf-8"))
+        await writer.drain()
+        return json.loads(await reader.readline())
+    finally:
+        writer.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident RAG query service (JSON lines over TCP or a Unix socket).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="Serve on this Unix socket path instead of TCP.")
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    parser.add_argument("--max-pipelined", type=int, default=32, help="Concurrent requests per connection.")
+    args = parser.parse_args()
+
+    async def run():
+        service = RagQueryServer(max_concurrency=args.max_concurrency, max_pipelined=args.max_pipelined)
+        await service.serve(args.host, args.port, args.unix)
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print("\n👋 RAG query service stopped.")
+
+if __name__ == "__main__":
+    main()
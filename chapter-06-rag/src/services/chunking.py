@@ -0,0 +1,161 @@
+# src/services/chunking.py
+import codecs
+import mmap
+import os
+from functools import lru_cache
+from typing import IO, Iterable, Iterator, List, Literal, Tuple, Union
+
+ChunkUnit = Literal['words', 'chars', 'tokens']
+
+
+@lru_cache(maxsize=None)
+def _encoder():
+    """Loaded on first use so importing this module stays cheap."""
+    try:
+        import tiktoken  # Optional: exact token counts when available
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Token count with tiktoken if installed, otherwise the usual ~4 chars/token estimate."""
+    encoder = _encoder()
+    if encoder is not None:
+        return len(encoder.encode(text))
+    return max(1, len(text) // 4) if text else 0
+
+
+def iter_text_blocks(source: Union[str, IO], block_size: int = 1 << 20, use_mmap: bool = True) -> Iterator[str]:
+    """
+    Yields decoded text blocks of roughly block_size from a path or an open file handle.
+    Paths are memory-mapped by default, so the OS pages the file in and out as we go.
+    """
+    if not isinstance(source, str):
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        while True:
+            block = source.read(block_size)
+            if not block:
+                break
+            yield decoder.decode(block) if isinstance(block, bytes) else block
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+        return
+
+    with open(source, "rb") as f:
+        if use_mmap and os.fstat(f.fileno()).st_size > 0:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield from iter_text_blocks(mm, block_size)
+        else:
+            yield from iter_text_blocks(f, block_size)
+
+
+def _iter_lines(blocks: Iterable[str], max_line_chars: int = 1 << 20) -> Iterator[str]:
+    """Re-splits blocks into lines; a runaway line without newlines is cut at whitespace."""
+    pending = ""
+    for block in blocks:
+        pending += block
+        lines = pending.split("\n")
+        pending = lines.pop()
+        yield from lines
+        if len(pending) > max_line_chars:
+            cut = pending.rfind(" ") + 1 or len(pending)
+            yield pending[:cut]
+            pending = pending[cut:]
+    if pending:
+        yield pending
+
+
+class StreamingChunker:
+    """
+    Overlapping chunker that works on a stream instead of a whole document in memory.
+    Only the current chunk (plus one line of look-ahead) is resident at any time.
+
+    chunk_size / chunk_overlap are measured in `unit` (words, characters or tokens).
+    Words are never split. When a chunk is full, it is cut at the last paragraph
+    break in its second half if there is one; such clean cuts start the next chunk
+    without overlap.
+    """
+    def __init__(self, chunk_size: int = 50, chunk_overlap: int = 10, unit: ChunkUnit = 'words'):
+        if chunk_size <= 0 or not 0 <= chunk_overlap < chunk_size:
+            raise ValueError("Need chunk_size > 0 and 0 <= chunk_overlap < chunk_size.")
+        if unit not in ('words', 'chars', 'tokens'):
+            raise ValueError(f"Unknown chunk unit: {unit}")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.unit = unit
+
+    def _measure(self, word: str) -> int:
+        if self.unit == 'words':
+            return 1
+        if self.unit == 'chars':
+            return len(word) + 1  # Count the joining space as well
+        return count_tokens(" " + word)
+
+    @staticmethod
+    def _render(pieces: List[Tuple[str, int, bool]]) -> str:
+        parts = []
+        for i, (word, _size, paragraph_start) in enumerate(pieces):
+            if i > 0:
+                parts.append("\n\n" if paragraph_start else " ")
+            parts.append(word)
+        return "".join(parts)
+
+    def _cut_point(self, pieces: List[Tuple[str, int, bool]]) -> Tuple[int, bool]:
+        """Returns (index to cut at, whether the cut is a paragraph boundary)."""
+        total = 0
+        last_fit = 0
+        best_paragraph = 0
+        for i, (_word, size, paragraph_start) in enumerate(pieces):
+            if i > 0 and paragraph_start and total >= self.chunk_size // 2:
+                best_paragraph = i
+            if total + size > self.chunk_size and i > 0:
+                break
+            total += size
+            last_fit = i + 1
+        if best_paragraph:
+            return best_paragraph, True
+        return max(last_fit, 1), False
+
+    def _overlap_start(self, pieces: List[Tuple[str, int, bool]], cut: int) -> int:
+        """Index where the next chunk starts so that it re-uses ~chunk_overlap units."""
+        start = cut
+        carried = 0
+        while start > 1 and carried + pieces[start - 1][1] <= self.chunk_overlap:
+            start -= 1
+            carried += pieces[start][1]
+        return start
+
+    def iter_chunks(self, blocks: Iterable[str]) -> Iterator[str]:
+        pieces: List[Tuple[str, int, bool]] = []
+        buffered = 0
+        fresh = 0  # Pieces not yet emitted in any chunk
+        paragraph_start = False
+
+        for line in _iter_lines(blocks):
+            words = line.split()
+            if not words:
+                paragraph_start = bool(pieces)
+                continue
+            for word in words:
+                size = self._measure(word)
+                pieces.append((word, size, paragraph_start))
+                paragraph_start = False
+                buffered += size
+                fresh += 1
+
+                while buffered > self.chunk_size:
+                    cut, clean = self._cut_point(pieces)
+                    yield self._render(pieces[:cut])
+                    start = cut if clean else self._overlap_start(pieces, cut)
+                    pieces = pieces[start:]
+                    buffered = sum(size for _w, size, _p in pieces)
+                    fresh = len(pieces) - (cut - start)
+
+        if fresh > 0 and pieces:
+            yield self._render(pieces)
+
+    def iter_file(self, source: Union[str, IO], use_mmap: bool = True) -> Iterator[str]:
+        """Streams chunks straight from a path (memory-mapped) or an open file handle."""
+        return self.iter_chunks(iter_text_blocks(source, use_mmap=use_mmap))
@@ -0,0 +1,189 @@
+# src/services/context_assembly.py
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.interfaces import IngestionDocument
+from src.tokenization import tokenize
+from src.services.chunking import count_tokens
+
+
+@dataclass
+class AssembledContext:
+    """The prompt context built from one query's retrieved documents."""
+    documents: List[IngestionDocument]
+    text: str
+    retrieved_tokens: int   # Tokens if every retrieved document were pasted as-is
+    context_tokens: int     # Tokens actually sent
+    merged_chunks: int = 0
+    dropped_duplicates: int = 0
+    dropped_for_budget: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.retrieved_tokens - self.context_tokens)
+
+
+def _chunk_position(doc: IngestionDocument) -> Optional[Tuple[str, int]]:
+    """(source, chunk_index) for chunks produced by the text ingestion, None for anything else."""
+    metadata = doc.metadata or {}  # Stores may hand back None for a document stored without metadata
+    source = metadata.get("source")
+    index = metadata.get("chunk_index")
+    if source is None or not isinstance(index, int) or isinstance(index, bool):
+        return None
+    return str(source), index
+
+
+def _join_overlapping(left: str, right: str, max_overlap: int = 256) -> str:
+    """Concatenates two consecutive chunks, dropping the words `right` repeats from the end of `left`."""
+    left_words, right_words = left.split(), right.split()
+    for k in range(min(len(left_words), len(right_words), max_overlap), 0, -1):
+        if left_words[-k:] == right_words[:k]:
+            rest = " ".join(right_words[k:])
+            return f"{left} {rest}" if rest else left
+    return f"{left}\n{right}"
+
+
+def _containment(a: Set[str], b: Set[str]) -> float:
+    """Share of the smaller term set found in the other one (1.0: one text is inside the other)."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / min(len(a), len(b))
+
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class ContextAssembler:
+    """
+    Turns ranked retrieval results into the smallest prompt context that still covers them.
+
+    1. Adjacent chunks of the same source (consecutive chunk_index) are merged into one
+       passage and the chunk_overlap words they share are written once.
+    2. Passages are picked greedily with Maximal Marginal Relevance: relevance (retrieval
+       rank, nudged by query-term coverage) minus similarity to what is already picked,
+       weighted by `diversity`.
+    3. A passage whose terms are mostly contained in an already picked one is dropped as
+       a near-duplicate; passages that do not fit the token budget are skipped.
+    """
+    def __init__(
+        self,
+        token_budget: int = 1024,
+        diversity: float = 0.7,
+        duplicate_threshold: float = 0.8,
+        separator: str = "\n\n",
+    ):
+        if token_budget <= 0:
+            raise ValueError("token_budget must be positive.")
+        if not 0.0 <= diversity <= 1.0:
+            raise ValueError("diversity must be between 0 and 1.")
+        self.token_budget = token_budget
+        self.diversity = diversity
+        self.duplicate_threshold = duplicate_threshold
+        self.separator = separator
+
+    def _merge_adjacent(self, documents: List[IngestionDocument]) -> Tuple[List[Tuple[int, IngestionDocument]], int]:
+        """(best rank, passage) pairs in rank order, plus how many chunks were folded into others."""
+        passages: List[Tuple[int, IngestionDocument]] = []
+        by_source: Dict[str, Dict[int, Tuple[int, IngestionDocument]]] = {}
+        for rank, doc in enumerate(documents):
+            position = _chunk_position(doc)
+            if position is None:
+                passages.append((rank, doc))
+            else:
+                # The same chunk retrieved twice keeps its best rank
+                by_source.setdefault(position[0], {}).setdefault(position[1], (rank, doc))
+
+        merged = 0
+        for chunks in by_source.values():
+            run: List[Tuple[int, IngestionDocument]] = []
+            for index in sorted(chunks):
+                if run and index != run[-1][1].metadata["chunk_index"] + 1:
+                    passages.append(self._merge_run(run))
+                    run = []
+                run.append(chunks[index])
+            passages.append(self._merge_run(run))
+            merged += len(chunks) - sum(1 for i in chunks if i - 1 not in chunks)
+
+        passages.sort(key=lambda item: item[0])
+        return passages, merged
+
+    @staticmethod
+    def _merge_run(run: List[Tuple[int, IngestionDocument]]) -> Tuple[int, IngestionDocument]:
+        first = run[0][1]
+        if len(run) == 1:
+            return run[0][0], first
+        content = first.content
+        for _, doc in run[1:]:
+            content = _join_overlapping(content, doc.content)
+        metadata = {**first.metadata, "merged_chunks": len(run)}
+        return min(rank for rank, _ in run), IngestionDocument(content=content, metadata=metadata, doc_id=first.doc_id)
+
+    def _truncate(self, text: str, budget: int) -> str:
+        """Longest word prefix of `text` that fits in `budget` tokens."""
+        words = text.split()
+        low, high = 0, len(words)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if count_tokens(" ".join(words[:mid])) <= budget:
+                low = mid
+            else:
+                high = mid - 1
+        return " ".join(words[:low])
+
+    def assemble(self, query: str, documents: List[IngestionDocument]) -> AssembledContext:
+        """`documents` are expected in retrieval order, best first."""
+        retrieved_tokens = count_tokens(self.separator.join(doc.content for doc in documents))
+        passages, merged = self._merge_adjacent(documents)
+
+        total = max(len(documents), 1)
+        query_terms = set(tokenize(query))
+        terms = [set(tokenize(doc.content)) for _, doc in passages]
+        relevance = [
+            0.8 * (1.0 - rank / total) + 0.2 * (len(query_terms & passage_terms) / len(query_terms) if query_terms else 0.0)
+            for (rank, _), passage_terms in zip(passages, terms)
+        ]
+        separator_tokens = count_tokens(self.separator)
+
+        selected: List[int] = []
+        contents: List[str] = []
+        used = dropped_duplicates = dropped_for_budget = 0
+        remaining = list(range(len(passages)))
+        while remaining:
+            best = max(remaining, key=lambda i: self.diversity * relevance[i] - (1.0 - self.diversity) * max(
+                (_jaccard(terms[i], terms[j]) for j in selected), default=0.0))
+            remaining.remove(best)
+
+            if any(_containment(terms[best], terms[j]) >= self.duplicate_threshold for j in selected):
+                dropped_duplicates += 1
+                continue
+
+            content = passages[best][1].content
+            cost = count_tokens(content) + (separator_tokens if selected else 0)
+            if used + cost > self.token_budget:
+                if selected:
+                    dropped_for_budget += 1
+                    continue
+                # Even the best passage is too long: keep as much of it as fits
+                content = self._truncate(content, self.token_budget)
+                cost = count_tokens(content)
+            selected.append(best)
+            contents.append(content)
+            used += cost
+
+        selected_docs = [
+            IngestionDocument(content=content, metadata=passages[i][1].metadata, doc_id=passages[i][1].doc_id)
+            for i, content in zip(selected, contents)
+        ]
+        text = self.separator.join(contents)
+        return AssembledContext(
+            documents=selected_docs,
+            text=text,
+            retrieved_tokens=retrieved_tokens,
+            context_tokens=count_tokens(text),
+            merged_chunks=merged,
+            dropped_duplicates=dropped_duplicates,
+            dropped_for_budget=dropped_for_budget,
+        )
@@ -1,13 +1,28 @@
 # src/services/generation.py
-from typing import List
+from typing import List, Optional
 from src.interfaces import IngestionDocument
+from src.services.context_assembly import ContextAssembler
 
 class MockLLMService:
     """
     Simulates the AI generation layer.
     It takes the retrieved documents (context) and the user question to form an answer.
     """
+    def __init__(self, context_assembler: Optional[ContextAssembler] = None):
+        # Optional: with an assembler, retrieved documents are merged, deduplicated and
+        # trimmed to its token budget before they reach the "prompt"; without one, all
+        # retrieved documents are used as given
+        self.context_assembler = context_assembler
+
     def generate_answer(self, user_query: str, context_docs: List[IngestionDocument]) -> str:
+        # 0. Assemble the Context (opt-in): merge overlapping chunks, drop near-duplicates, respect the budget
+        if self.context_assembler is not None:
+            assembled = self.context_assembler.assemble(user_query, context_docs)
+            context_docs = assembled.documents
+            print(f"\n✂️ Context: {assembled.retrieved_tokens} -> {assembled.context_tokens} tokens "
+                  f"(saved {assembled.tokens_saved}, merged {assembled.merged_chunks}, "
+                  f"dropped {assembled.dropped_duplicates} duplicates)")
+
         # 1. Analyze the Context
         # We look at what the retrieval step found in the database
         found_image = any("IMAGE FOUND" in d.content for d in context_docs)
@@ -0,0 +1,90 @@
+# src/services/image_probe.py
+import struct
+from dataclasses import dataclass
+from typing import BinaryIO, Optional
+
+
+@dataclass
+class ImageInfo:
+    """What we know about an image without decoding a single pixel."""
+    width: int
+    height: int
+    format: str
+    format_description: str
+
+
+# Same descriptions PIL reports, so document text does not change with the probe path
+_DESCRIPTIONS = {
+    "JPEG": "JPEG (ISO 10918)",
+    "PNG": "Portable network graphics",
+    "GIF": "Compuserve GIF",
+    "BMP": "Windows Bitmap",
+}
+
+# JPEG start-of-frame markers carry the dimensions (all SOFn except DHT/JPG/DAC)
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _probe_jpeg(f: BinaryIO) -> Optional[ImageInfo]:
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        if code == 0xFF:  # Fill byte, re-sync on the next one
+            f.seek(-1, 1)
+            continue
+        if code in (0xD8, 0x01) or 0xD0 <= code <= 0xD7:
+            continue  # Markers without a length field
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        (length,) = struct.unpack(">H", length_bytes)
+        if code in _JPEG_SOF:
+            header = f.read(5)
+            if len(header) < 5:
+                return None
+            height, width = struct.unpack(">HH", header[1:5])
+            return ImageInfo(width, height, "JPEG", _DESCRIPTIONS["JPEG"])
+        # Skip the whole segment (EXIF, ICC profiles...) without reading it
+        f.seek(length - 2, 1)
+
+
+def _probe_header(f: BinaryIO) -> Optional[ImageInfo]:
+    head = f.read(32)
+    if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+        width, height = struct.unpack(">II", head[16:24])
+        return ImageInfo(width, height, "PNG", _DESCRIPTIONS["PNG"])
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        width, height = struct.unpack("<HH", head[6:10])
+        return ImageInfo(width, height, "GIF", _DESCRIPTIONS["GIF"])
+    if head[:2] == b"BM" and len(head) >= 26:
+        width, height = struct.unpack("<ii", head[18:26])
+        return ImageInfo(width, abs(height), "BMP", _DESCRIPTIONS["BMP"])
+    if head[:2] == b"\xff\xd8":
+        return _probe_jpeg(f)
+    return None
+
+
+def probe_image(file_path: str) -> ImageInfo:
+    """
+    Reads only the header bytes needed for size and format (PNG, GIF, BMP, JPEG).
+    Other formats fall back to PIL, whose Image.open is lazy and also stops at the header.
+    Raises ValueError if the file is not a recognizable image.
+    """
+    with open(file_path, "rb") as f:
+        info = _probe_header(f)
+    if info is not None:
+        return info
+
+    try:
+        from PIL import Image
+    except ImportError as e:
+        raise ValueError(f"Unrecognized image format and Pillow is not installed: {file_path}") from e
+    try:
+        with Image.open(file_path) as img:
+            width, height = img.size
+            return ImageInfo(width, height, img.format or "UNKNOWN", img.format_description or "Unknown")
+    except Exception as e:
+        raise ValueError(f"Not a readable image: {file_path}") from e
@@ -0,0 +1,72 @@
+# src/services/ingestion_manifest.py
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+
+def content_hash(*parts: str) -> str:
+    """Deterministic ID for a piece of content (sha256 over the NUL-joined parts)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class IngestionManifest:
+    """
+    Local record of what has already been ingested: source -> ordered chunk hashes,
+    plus artifact document ID -> fingerprint of the file it was built from.
+    Lets a re-ingest embed only new chunks and delete the ones that disappeared.
+    Stored as a small JSON file next to the vector store.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._sources: Dict[str, Dict[str, Any]] = {}
+        self._artifacts: Dict[str, str] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._sources = data.get("sources", {})
+            self._artifacts = data.get("artifacts", {})
+
+    def get_chunks(self, source: str) -> List[str]:
+        entry = self._sources.get(source)
+        return list(entry["chunks"]) if entry else []
+
+    def get_metadata_hash(self, source: str) -> Optional[str]:
+        entry = self._sources.get(source)
+        return entry.get("metadata_hash") if entry else None
+
+    def set_source(self, source: str, chunk_hashes: List[str], metadata_hash: str):
+        self._sources[source] = {"chunks": list(chunk_hashes), "metadata_hash": metadata_hash}
+
+    def remove_source(self, source: str):
+        self._sources.pop(source, None)
+
+    def sources(self) -> List[str]:
+        return list(self._sources)
+
+    def total_chunks(self) -> int:
+        return sum(len(entry["chunks"]) for entry in self._sources.values())
+
+    def clear(self):
+        """Forgets everything, e.g. after the vector store was reset or recreated."""
+        self._sources.clear()
+        self._artifacts.clear()
+
+    def artifacts(self) -> Dict[str, str]:
+        return dict(self._artifacts)
+
+    def set_artifact(self, doc_id: str, fingerprint: str):
+        self._artifacts[doc_id] = fingerprint
+
+    def save(self):
+        """Writes atomically so a crash never leaves a half-written manifest behind."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"sources": self._sources, "artifacts": self._artifacts}, f)
+        os.replace(tmp_path, self.path)
@@ -1,30 +1,53 @@
 # src/services/multimodal_ingestion.py
+import hashlib
+import json
 import os
-from typing import List
-from PIL import Image  # This handles the actual image binary data
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from src.interfaces import VectorStoreInterface, IngestionDocument
-from src.models import ShipmentCase
+from src.models import ShipmentCase, ShipmentArtifact, CaseIngestionReport
+from src.services.image_probe import probe_image
+from src.services.ingestion_manifest import IngestionManifest, content_hash
 from src.services.text_ingestion import TextIngestionService
 
+SUPPORTED_ARTIFACTS = ('damage_photo', 'ocr_text')
+
+def _file_digest(file_path: str, block_size: int = 1 << 20) -> str:
+    """sha256 of the raw file bytes, read in blocks (hashlib releases the GIL, so threads overlap)."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
 class MultimodalIngestionService:
-    def __init__(self, vector_store: VectorStoreInterface, text_service: TextIngestionService):
+    def __init__(
+        self,
+        vector_store: VectorStoreInterface,
+        text_service: TextIngestionService,
+        manifest: Optional[IngestionManifest] = None,
+    ):
         self.vector_store = vector_store
         self.text_service = text_service
+        self.manifest = manifest
+        # doc_id -> fingerprint of the file bytes + metadata it was last stored from
+        self._ingested = manifest.artifacts() if manifest else {}
+        self._lock = threading.Lock()
 
     def _extract_image_features(self, file_path: str) -> str:
         """
-        Opens the physical file, verifies it's an image, and extracts metadata.
+        Reads only the image header to verify it's an image and extract metadata.
         In a real AI system, this is where we would send the image bytes to CLIP/Gemini.
         """
         try:
-            with Image.open(file_path) as img:
-                # We are actually reading the binary header of the file here
-                width, height = img.size
-                format_desc = img.format_description
-                filename = os.path.basename(file_path)
-                
-                # We return a structured description of what we found
-                return f"[IMAGE FOUND: File={filename} | Dim={width}x{height} | Type={format_desc}]"
+            # Size and format come from the header; no pixels are decoded
+            info = probe_image(file_path)
+            filename = os.path.basename(file_path)
+
+            # We return a structured description of what we found
+            return f"[IMAGE FOUND: File={filename} | Dim={info.width}x{info.height} | Type={info.format_description}]"
         except Exception as e:
             print(f"❌ Error opening image {file_path}: {e}")
             return "[IMAGE ERROR: Corrupt or missing file]"
@@ -39,47 +62,220 @@ class MultimodalIngestionService:
         except Exception as e:
              return f"[TEXT ERROR: {e}]"
 
-    def ingest_case(self, case: ShipmentCase) -> int:
-        print(f"--- 📥 Starting Ingestion for Case: {case.shipment_id} ---")
-        docs_to_ingest = []
-
+    @staticmethod
+    def _doc_ids(case: ShipmentCase) -> List[str]:
+        """
+        One document ID per artifact. The first artifact of a type keeps the plain
+        "<shipment>_<type>" ID; further ones of the same type get "_2", "_3", ...
+        """
+        seen: Dict[str, int] = {}
+        doc_ids = []
         for artifact in case.artifacts:
-            # Validation: Does the file actually exist?
-            if not os.path.exists(artifact.content_path):
-                print(f"⚠️ Warning: File not found at {artifact.content_path}")
-                continue
+            seen[artifact.artifact_type] = seen.get(artifact.artifact_type, 0) + 1
+            doc_id = f"{case.shipment_id}_{artifact.artifact_type}"
+            doc_ids.append(doc_id if seen[artifact.artifact_type] == 1 else f"{doc_id}_{seen[artifact.artifact_type]}")
+        return doc_ids
 
-            base_metadata = {
-                "parent_id": case.shipment_id,
-                "type": artifact.artifact_type,
-                **artifact.metadata
-            }
+    def reset(self):
+        """Clears the vector store and forgets what was ingested into it."""
+        self.vector_store.reset()
+        self._forget_ingested()
 
+    def _forget_ingested(self):
+        with self._lock:
+            self._ingested.clear()
+        if self.manifest:
+            self.manifest.clear()
+            self.manifest.save()
+
+    def _check_ingested(self):
+        """Fingerprints for more documents than the store holds are stale (store reset elsewhere)."""
+        stored = self.vector_store.count()
+        if stored is not None and stored < len(self._ingested):
+            self._forget_ingested()
+
+    def _process_artifact(
+        self, case: ShipmentCase, artifact: ShipmentArtifact, doc_id: str
+    ) -> Tuple[str, Optional[IngestionDocument], Optional[str]]:
+        """
+        Turns one artifact into a document. Returns (status, document, fingerprint)
+        where status is 'stored', 'duplicate', 'missing', 'unsupported' or 'failed'
+        (the path exists but could not be read, e.g. a directory).
+        """
+        # Validation: Does the file actually exist?
+        if not os.path.exists(artifact.content_path):
+            return 'missing', None, None
+        if artifact.artifact_type not in SUPPORTED_ARTIFACTS:
+            return 'unsupported', None, None
+
+        base_metadata = {
+            "parent_id": case.shipment_id,
+            "type": artifact.artifact_type,
+            **artifact.metadata
+        }
+
+        # Byte-identical file with identical metadata: already in the store, skip it
+        try:
+            fingerprint = content_hash(
+                _file_digest(artifact.content_path),
+                json.dumps(base_metadata, sort_keys=True, default=str)
+            )
+        except Exception as e:
+            print(f"❌ Error reading {artifact.content_path}: {e}")
+            return 'failed', None, None
+        with self._lock:
+            if self._ingested.get(doc_id) == fingerprint:
+                return 'duplicate', None, None
+            self._ingested[doc_id] = fingerprint  # Claimed, so a concurrent twin is skipped
+
+        try:
             # Branching logic based on artifact type
             if artifact.artifact_type == 'damage_photo':
                 # Open and process the image file
-                visual_description = self._extract_image_features(artifact.content_path)
-                
-                doc = IngestionDocument(
-                    content=visual_description, 
-                    metadata=base_metadata,
-                    doc_id=f"{case.shipment_id}_{artifact.artifact_type}"
-                )
-                docs_to_ingest.append(doc)
-                print(f"📸 Processed Real Image: {artifact.content_path}")
-
-            elif artifact.artifact_type == 'ocr_text':
+                content = self._extract_image_features(artifact.content_path)
+            else:
                 # Open and read the text file
-                text_content = self._read_text_file(artifact.content_path)
-                
-                doc = IngestionDocument(
-                    content=text_content,
-                    metadata=base_metadata,
-                    doc_id=f"{case.shipment_id}_{artifact.artifact_type}"
-                )
+                content = self._read_text_file(artifact.content_path)
+
+            doc = IngestionDocument(content=content, metadata=base_metadata, doc_id=doc_id)
+            return 'stored', doc, fingerprint
+        except Exception as e:
+            print(f"❌ Error processing {artifact.content_path}: {e}")
+            self._release(doc_id, fingerprint)
+            return 'failed', None, None
+
+    def _release(self, doc_id: str, fingerprint: str):
+        """Drops a claim that never made it to the store, so a retry is not skipped as a duplicate."""
+        with self._lock:
+            if self._ingested.get(doc_id) == fingerprint:
+                del self._ingested[doc_id]
+
+    def _store(self, docs: List[IngestionDocument], fingerprints: List[str]) -> bool:
+        """Writes a batch; on failure the fingerprints are released so a retry is not skipped."""
+        if not docs:
+            return True
+        if self.vector_store.add_documents(docs):
+            if self.manifest:
+                for doc, fingerprint in zip(docs, fingerprints):
+                    self.manifest.set_artifact(doc.doc_id, fingerprint)
+            return True
+        for doc, fingerprint in zip(docs, fingerprints):
+            self._release(doc.doc_id, fingerprint)
+        return False
+
+    def ingest_case(self, case: ShipmentCase) -> int:
+        print(f"--- 📥 Starting Ingestion for Case: {case.shipment_id} ---")
+        self._check_ingested()
+        docs_to_ingest, fingerprints = [], []
+
+        for artifact, doc_id in zip(case.artifacts, self._doc_ids(case)):
+            status, doc, fingerprint = self._process_artifact(case, artifact, doc_id)
+            if status == 'missing':
+                print(f"⚠️ Warning: File not found at {artifact.content_path}")
+            elif status == 'duplicate':
+                print(f"♻️ Unchanged, skipped: {artifact.content_path}")
+            elif status == 'stored':
                 docs_to_ingest.append(doc)
-                print(f"📄 Processed Real Text: {artifact.content_path}")
+                fingerprints.append(fingerprint)
+                label = "📸 Processed Real Image" if artifact.artifact_type == 'damage_photo' else "📄 Processed Real Text"
+                print(f"{label}: {artifact.content_path}")
 
         # Store everything in the vector DB
-        self.vector_store.add_documents(docs_to_ingest)
-        return len(docs_to_ingest)
\ No newline at end of file
+        self._store(docs_to_ingest, fingerprints)
+        if self.manifest:
+            self.manifest.save()
+        return len(docs_to_ingest)
+
+    def ingest_cases(
+        self,
+        cases: Iterable[ShipmentCase],
+        max_workers: int = 8,
+        batch_size: int = 256,
+    ) -> CaseIngestionReport:
+        """
+        Bulk version of ingest_case for high-volume uploads.
+        Artifacts of all cases are read in a bounded thread pool (at most 4 * max_workers
+        in flight), and the resulting documents are written in batches of `batch_size`
+        that may span several cases. Unchanged artifacts are skipped by content hash.
+        """
+        if batch_size <= 0 or max_workers <= 0:
+            raise ValueError("batch_size and max_workers must be positive.")
+
+        cases = list(cases)
+        report = CaseIngestionReport(total_cases=len(cases))
+        start = time.perf_counter()
+        self._check_ingested()
+        work = (
+            (case, artifact, doc_id)
+            for case in cases
+            for artifact, doc_id in zip(case.artifacts, self._doc_ids(case))
+        )
+        batch_docs: List[IngestionDocument] = []
+        batch_fingerprints: List[str] = []
+        batch_ids: Set[str] = set()
+
+        def process(case: ShipmentCase, artifact: ShipmentArtifact, doc_id: str):
+            began = time.perf_counter()
+            result = self._process_artifact(case, artifact, doc_id)
+            return result, time.perf_counter() - began
+
+        def flush():
+            if not self._store(batch_docs, batch_fingerprints):
+                report.failed_documents += len(batch_docs)
+            else:
+                report.stored_documents += len(batch_docs)
+            batch_docs.clear()
+            batch_fingerprints.clear()
+            batch_ids.clear()
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            pending = {}
+            exhausted = False
+            while not exhausted or pending:
+                while not exhausted and len(pending) < 4 * max_workers:
+                    item = next(work, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    pending[pool.submit(process, *item)] = item[1]
+
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    artifact = pending.pop(future)
+                    try:
+                        (status, doc, fingerprint), seconds = future.result()
+                    except Exception as e:
+                        # One bad artifact must not lose the batches of the others
+                        print(f"❌ Error processing {artifact.content_path}: {e}")
+                        report.failed_artifacts += 1
+                        continue
+                    kind = artifact.artifact_type
+                    report.artifact_counts[kind] = report.artifact_counts.get(kind, 0) + 1
+                    report.artifact_seconds[kind] = report.artifact_seconds.get(kind, 0.0) + seconds
+                    if status == 'missing':
+                        report.missing_files += 1
+                    elif status == 'failed':
+                        report.failed_artifacts += 1
+                    elif status == 'duplicate':
+                        report.skipped_duplicates += 1
+                    elif status == 'stored':
+                        # The same case listed twice: one upsert must not carry an ID twice
+                        if doc.doc_id in batch_ids:
+                            flush()
+                        batch_ids.add(doc.doc_id)
+                        batch_docs.append(doc)
+                        batch_fingerprints.append(fingerprint)
+                        if len(batch_docs) >= batch_size:
+                            flush()
+
+        flush()
+        if self.manifest:
+            self.manifest.save()
+        report.elapsed_seconds = time.perf_counter() - start
+        print(f"📦 Ingested {report.total_cases} cases: {report.stored_documents} stored, "
+              f"{report.skipped_duplicates} unchanged, {report.missing_files} missing, "
+              f"{report.failed_artifacts} unreadable "
+              f"({report.cases_per_second:.1f} cases/sec)")
+        return report
@@ -1,50 +1,171 @@
+import json
 import uuid
-from typing import List
+from typing import IO, Iterable, List, Optional, Union
 from src.interfaces import VectorStoreInterface, IngestionDocument
+from src.services.chunking import ChunkUnit, StreamingChunker
+from src.services.ingestion_manifest import IngestionManifest, content_hash
 
 class TextIngestionService:
-    def __init__(self, vector_store: VectorStoreInterface, chunk_size: int = 50, chunk_overlap: int = 10):
+    def __init__(
+        self,
+        vector_store: VectorStoreInterface,
+        chunk_size: int = 50,
+        chunk_overlap: int = 10,
+        manifest: Optional[IngestionManifest] = None,
+    ):
         self.vector_store = vector_store
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.manifest = manifest
 
     def _create_chunks(self, text: str) -> List[str]:
         """
         Simple overlapping chunker. In production, use LangChain's RecursiveCharacterTextSplitter.
         """
         words = text.split()
-        chunks = [] 
+        chunks = []
         for i in range(0, len(words), self.chunk_size - self.chunk_overlap):
             chunk = " ".join(words[i:i + self.chunk_size])
             chunks.append(chunk)
         return chunks
 
+    def _check_manifest(self):
+        """
+        A manifest that records more chunks than the store holds is stale (the collection
+        was reset or recreated); trusting it would skip every chunk, so it is dropped.
+        """
+        if self.manifest is None:
+            return
+        stored = self.vector_store.count()
+        if stored is not None and stored < self.manifest.total_chunks():
+            print(f"⚠️ Manifest lists {self.manifest.total_chunks()} chunks but the store holds {stored}; re-ingesting.")
+            self.manifest.clear()
+            self.manifest.save()
+
+    @staticmethod
+    def chunk_id(source: str, chunk_text: str) -> str:
+        """Content-addressed chunk ID: the same text from the same source always maps to the same ID."""
+        return content_hash(source, chunk_text)
+
     def ingest_text(self, text: str, source_metadata: dict) -> int:
         """
         Orchestrates the ingestion flow: Chunk -> Wrap -> Store.
-        Returns the number of chunks indexed.
+        With a manifest, only new or changed chunks are embedded and chunks that
+        disappeared from the source are deleted.
+        Returns the number of chunks written to the vector store.
         """
         chunks = self._create_chunks(text)
-        docs_to_ingest = []
-        
-        for idx, chunk_text in enumerate(chunks):
+        return self._ingest_chunks(chunks, source_metadata, total_chunks=len(set(chunks)))
+
+    def ingest_file(
+        self,
+        file_source: Union[str, IO],
+        source_metadata: dict,
+        unit: ChunkUnit = 'words',
+        batch_size: int = 64,
+        use_mmap: bool = True,
+    ) -> int:
+        """
+        Streaming variant of ingest_text for very large files.
+        Chunks are produced lazily from a path (memory-mapped) or an open file handle
+        and written to the vector store every batch_size chunks, so peak memory does
+        not depend on the file size. total_chunks is not known up front and is omitted.
+        """
+        chunker = StreamingChunker(self.chunk_size, self.chunk_overlap, unit=unit)
+        chunks = chunker.iter_file(file_source, use_mmap=use_mmap)
+        return self._ingest_chunks(chunks, source_metadata, batch_size=batch_size)
+
+    def _ingest_chunks(
+        self,
+        chunks: Iterable[str],
+        source_metadata: dict,
+        total_chunks: Optional[int] = None,
+        batch_size: Optional[int] = None,
+    ) -> int:
+        source = str(source_metadata.get("source", ""))
+        if self.manifest is not None and not source:
+            raise ValueError("Incremental ingestion needs a 'source' key in source_metadata.")
+        self._check_manifest()
+        # Unnamed text gets IDs of its own, so equal text from two unnamed sources does not collide
+        id_source = source or f"unnamed:{uuid.uuid4()}"
+
+        previous_ids = self.manifest.get_chunks(source) if self.manifest is not None else []
+        previous_index = {chunk_hash: idx for idx, chunk_hash in enumerate(previous_ids)}
+        metadata_hash = content_hash(json.dumps(source_metadata, sort_keys=True, default=str))
+        metadata_changed = (
+            self.manifest is not None and self.manifest.get_metadata_hash(source) != metadata_hash
+        )
+        total_changed = total_chunks is not None and len(previous_ids) != total_chunks
+
+        def chunk_metadata(idx: int) -> dict:
             # Create a rich metadata object for traceability
-            meta = {
-                **source_metadata,
-                "chunk_index": idx,
-                "total_chunks": len(chunks)
-            }
-            
-            doc = IngestionDocument(
-                content=chunk_text,
-                metadata=meta,
-                doc_id=str(uuid.uuid4())
+            meta = {**source_metadata, "chunk_index": idx}
+            if total_chunks is not None:
+                meta["total_chunks"] = total_chunks
+            return meta
+
+        # The full hash list is only kept when a manifest needs it; otherwise duplicates
+        # are only collapsed per batch so memory stays flat for huge files
+        track_all = self.manifest is not None
+        chunk_ids: List[str] = []
+        chunk_count = 0
+        seen = set()
+        docs_to_ingest: List[IngestionDocument] = []
+        moved_ids: List[str] = []
+        moved_metadatas: List[dict] = []
+        written = moved = 0
+
+        def flush():
+            # Delegate storage to the interface implementation
+            if docs_to_ingest and not self.vector_store.add_documents(docs_to_ingest):
+                raise RuntimeError("Failed to store documents in Vector DB.")
+            if moved_ids and not self.vector_store.update_metadata(moved_ids, moved_metadatas):
+                raise RuntimeError("Failed to update document metadata in Vector DB.")
+            docs_to_ingest.clear()
+            moved_ids.clear()
+            moved_metadatas.clear()
+            if not track_all:
+                seen.clear()
+
+        for chunk_text in chunks:
+            chunk_hash = self.chunk_id(id_source, chunk_text)
+            # Identical chunks inside one source collapse to one ID, keep the first occurrence
+            if chunk_hash in seen:
+                continue
+            seen.add(chunk_hash)
+            idx = chunk_count
+            chunk_count += 1
+            if track_all:
+                chunk_ids.append(chunk_hash)
+
+            if chunk_hash not in previous_index:
+                docs_to_ingest.append(IngestionDocument(
+                    content=chunk_text,
+                    metadata=chunk_metadata(idx),
+                    doc_id=chunk_hash
+                ))
+                written += 1
+            elif metadata_changed or total_changed or previous_index[chunk_hash] != idx:
+                # Unchanged text but a stale position/total: refresh metadata only, no re-embedding
+                moved_ids.append(chunk_hash)
+                moved_metadatas.append(chunk_metadata(idx))
+                moved += 1
+
+            if batch_size and len(docs_to_ingest) + len(moved_ids) >= batch_size:
+                flush()
+        flush()
+
+        removed_ids = [chunk_hash for chunk_hash in previous_ids if chunk_hash not in seen]
+        if removed_ids and not self.vector_store.delete_documents(removed_ids):
+            raise RuntimeError("Failed to delete stale documents from Vector DB.")
+
+        if self.manifest is not None:
+            # Only record the new state once the store has accepted every change
+            self.manifest.set_source(source, chunk_ids, metadata_hash)
+            self.manifest.save()
+            print(
+                f"♻️ {source}: {written} new, {moved} re-tagged, "
+                f"{len(removed_ids)} deleted, {chunk_count - written - moved} unchanged"
             )
-            docs_to_ingest.append(doc)
-        
-        # Delegate storage to the interface implementation
-        success = self.vector_store.add_documents(docs_to_ingest)
-        if not success:
-            raise RuntimeError("Failed to store documents in Vector DB.")
-            
-        return len(docs_to_ingest)
+
+        return written
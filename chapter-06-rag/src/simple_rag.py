@@ -1,39 +1,73 @@
-import chromadb
-from chromadb.utils import embedding_functions
-from openai import OpenAI  # Assuming you have API key set
+from functools import lru_cache
+from src.interfaces import IngestionDocument
+from src.services.context_assembly import AssembledContext, ContextAssembler
 
-client = chromadb.PersistentClient(path="./chroma_db")
-emb_fn = embedding_functions.DefaultEmbeddingFunction()
-collection = client.get_collection(name="driver_policy", embedding_function=emb_fn)
+# Nothing heavy happens at import time: the Chroma client, the local embedding model
+# and the OpenAI client are created on first use and then reused (see rag_server.py).
+CHROMA_PATH = "./chroma_db"
+COLLECTION_NAME = "driver_policy"
 
-llm_client = OpenAI()
+assembler = ContextAssembler(token_budget=512)
 
-def ask_rag(question):
-    print(f"\nUser Question: {question}")
-    
-    # 1. Retrieve (Get top 2 most relevant chunks)
-    results = collection.query(query_texts=[question], n_results=2)
-    context_text = "\n\n".join(results['documents'][0])
-    
-    print(f"--- Retrieved Context ---\n{context_text}\n-------------------------")
-    
-    # 2. Augment (Create prompt)
+@lru_cache(maxsize=None)
+def get_collection():
+    import chromadb
+    from chromadb.utils import embedding_functions
+
+    client = chromadb.PersistentClient(path=CHROMA_PATH)
+    emb_fn = embedding_functions.DefaultEmbeddingFunction()
+    return client.get_collection(name=COLLECTION_NAME, embedding_function=emb_fn)
+
+@lru_cache(maxsize=None)
+def get_llm_client():
+    from openai import OpenAI  # Assuming you have API key set
+    return OpenAI()
+
+def warm_up():
+    """Opens the collection and runs one query, which loads the embedding model into memory."""
+    get_collection().query(query_texts=["warm up"], n_results=1)
+
+def retrieve(question: str, limit: int = 4) -> AssembledContext:
+    # 1. Retrieve (Get the top candidates; assembly below keeps what fits the budget)
+    results = get_collection().query(query_texts=[question], n_results=limit)
+    docs = [
+        IngestionDocument(content=content, metadata=metadata or {}, doc_id=doc_id)
+        for doc_id, content, metadata in zip(results['ids'][0], results['documents'][0], results['metadatas'][0])
+    ]
+
+    # 2. Assemble (merge adjacent chunks, drop near-duplicates, stay within the token budget)
+    return assembler.assemble(question, docs)
+
+def generate(question: str, context_text: str) -> str:
+    # 3. Augment (Create prompt)
     prompt = f"""
     You are a support agent. Answer the question based ONLY on the context below.
-    
+
     Context:
     {context_text}
-    
+
     Question: {question}
     """
-    
-    # 3. Generate
-    response = llm_client.chat.completions.create(
+
+    # 4. Generate
+    response = get_llm_client().chat.completions.create(
         model="gpt-3.5-turbo",
         messages=[{"role": "user", "content": prompt}]
     )
-    
-    print(f"Answer: {response.choices[0].message.content}")
+    return response.choices[0].message.content
+
+def ask_rag(question):
+    print(f"\nUser Question: {question}")
+
+    assembled = retrieve(question)
+    context_text = assembled.text
+
+    print(f"--- Retrieved Context ---\n{context_text}\n-------------------------")
+    print(f"Context tokens: {assembled.context_tokens} (saved {assembled.tokens_saved} of {assembled.retrieved_tokens})")
+
+    answer = generate(question, context_text)
+    print(f"Answer: {answer}")
+    return answer
 
 if __name__ == "__main__":
     ask_rag("What is the speed limit in the city?")
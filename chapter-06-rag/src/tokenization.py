@@ -0,0 +1,18 @@
+# src/tokenization.py
+import re
+from typing import List
+
+# Keeps numbers and codes such as "45-minute", "4.5", "km/h" and "ls-2026-x" as one term
+_TERM_PATTERN = re.compile(r"[a-z0-9]+(?:[-./:][a-z0-9]+)*")
+_PART_SPLIT = re.compile(r"[-./:]")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms; compound terms are also indexed by their parts ("45-minute" -> 45, minute)."""
+    terms = []
+    for match in _TERM_PATTERN.finditer(text.lower()):
+        term = match.group()
+        terms.append(term)
+        if not term.isalnum():
+            terms.extend(part for part in _PART_SPLIT.split(term) if part)
+    return terms
@@ -1,11 +1,16 @@
 from __future__ import annotations
 
 import json
-from typing import Any, Dict, List, Optional, Tuple
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Generator, Iterable, List, Optional, Tuple
 
 from state import AgentState
 from tools import registry as tool_registry, is_error as tool_is_error
 from model_adapter import ModelAdapter
+from message_history import MessageHistory
+from decision_parser import StreamingDecisionParser, extract_first_object
+from tracing import NULL_TRACER, Tracer
 
 Message = Dict[str, str]
 
@@ -16,8 +21,9 @@ You MUST output exactly one valid JSON object and nothing else.
 Schema:
 {
   "action": "call_tool" or "finish",
-  "tool_name": string, only if action is call_tool
-  "tool_args": object, only if action is call_tool
+  "tool_name": string, only if action is call_tool (single call)
+  "tool_args": object, only if action is call_tool (single call)
+  "tool_calls": list of {"tool_name": string, "tool_args": object}, only if action is call_tool (several calls)
   "response": string only if action is finish
 }
 
@@ -25,24 +31,37 @@ Rules:
 1. If the user provides a specific date, ALWAYS call update_route with that exact date first.
 2. If update_route returns Error, do NOT try the same date again.
 3. Instead, explain the error naturally to the user (e.g., "I tried to update... but...") and ask for a valid date.
+4. If the request touches several shipments, put all the independent calls in "tool_calls" in ONE step.
 """
 
 def _decoder_extract_first_object(text: str) -> Optional[Dict[str, Any]]:
     """
-    Safer than brace counting.
-    Finds first JSON object and parses it using JSONDecoder.raw_decode.
+    Finds the first JSON object in the model output.
+    One string-aware pass over the text (see decision_parser), so long or noisy
+    outputs with many stray "{" stay linear.
     """
-    decoder = json.JSONDecoder()
-    start = text.find("{")
-    while start != -1:
-        try:
-            obj, _end = decoder.raw_decode(text[start:])
-            if isinstance(obj, dict):
-                return obj
-            return None
-        except json.JSONDecodeError:
-            start = text.find("{", start + 1)
-    return None
+    return extract_first_object(text)
+
+def _read_until_first_object(chunks: Iterable[str]) -> Tuple[str, bool]:
+    """
+    Collects streamed model output until the first complete JSON object has arrived.
+    That is the object the runtime would pick from the full output anyway, so the
+    rest of the generation is not read. Returns (text, cut_off).
+    """
+    parser = StreamingDecisionParser()
+    parts: List[str] = []
+    for chunk in chunks:
+        parts.append(chunk)
+        if parser.feed(chunk):
+            return "".join(parts), True
+    return "".join(parts), False
+
+def _validate_call(call: Dict[str, Any]) -> Tuple[bool, str]:
+    if not isinstance(call.get("tool_name"), str) or not call["tool_name"].strip():
+        return False, "Missing tool_name"
+    if not isinstance(call.get("tool_args"), dict):
+        return False, "Missing tool_args"
+    return True, ""
 
 def _validate_decision(obj: Dict[str, Any]) -> Tuple[bool, str]:
     action = obj.get("action")
@@ -50,10 +69,20 @@ def _validate_decision(obj: Dict[str, Any]) -> Tuple[bool, str]:
         return False, "Invalid action"
     
     if action == "call_tool":
-        if not isinstance(obj.get("tool_name"), str) or not obj["tool_name"].strip():
-            return False, "Missing tool_name"
-        if not isinstance(obj.get("tool_args"), dict):
-            return False, "Missing tool_args"
+        if "tool_calls" in obj:
+            calls = obj["tool_calls"]
+            if not isinstance(calls, list) or not calls:
+                return False, "tool_calls must be a non-empty list"
+            for call in calls:
+                if not isinstance(call, dict):
+                    return False, "Each tool_calls entry must be an object"
+                ok, err = _validate_call(call)
+                if not ok:
+                    return False, err
+        else:
+            ok, err = _validate_call(obj)
+            if not ok:
+                return False, err
             
     if action == "finish":
         if not isinstance(obj.get("response"), str):
@@ -61,7 +90,7 @@ def _validate_decision(obj: Dict[str, Any]) -> Tuple[bool, str]:
             
     return True, ""
 
-def _repair_json_only(adapter: ModelAdapter, messages: List[Message], bad: str, reason: str) -> Optional[Dict[str, Any]]:
+def _repair_messages(messages: List[Message], bad: str, reason: str) -> List[Message]:
     repair_msg = f"""
 Your previous output was invalid.
 Reason:
@@ -73,138 +102,268 @@ Previous output:
 Return ONLY one valid JSON object matching the schema.
 No markdown. No extra text.
 """
-    repaired = adapter.complete(messages + [{"role": "user", "content": repair_msg}])
-    return _decoder_extract_first_object(repaired)
-
-def _as_messages(state: AgentState) -> List[Message]:
-    msgs: List[Message] = [{"role": "system", "content": SYSTEM_PROMPT}]
-    for m in state["messages"]:
-        if isinstance(m, dict) and "role" in m and "content" in m:
-            role = str(m["role"])
-            content = str(m["content"])
-            if role in {"system", "user", "assistant"}:
-                msgs.append({"role": role, "content": content})
-            else:
-                msgs.append({"role": "user", "content": f"[{role}] {content}"})
-        else:
-            msgs.append({"role": "user", "content": str(m)})
-    return msgs
+    return messages + [{"role": "user", "content": repair_msg}]
 
-def run_agent(
+def _decision_calls(decision: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    """(tool_name, tool_args) pairs of a validated call_tool decision, in the order given."""
+    calls = decision.get("tool_calls") or [decision]
+    return [(call["tool_name"], call["tool_args"]) for call in calls]
+
+def _normalize_tool_args(tool_name: str, tool_args: Dict[str, Any], state: AgentState) -> None:
+    """Normalizing args (hallucination fix), in place."""
+    if tool_name == "update_route":
+        if "new_date" not in tool_args:
+            for date_key in ("date", "newDate", "route_date"):
+                if date_key in tool_args:
+                    # Move, don't copy: the tool would reject the unknown alias keyword
+                    tool_args["new_date"] = tool_args.pop(date_key)
+                    break
+        if "shipment_id" not in tool_args and isinstance(state.get("shipment_id"), str) and state["shipment_id"]:
+            tool_args["shipment_id"] = state["shipment_id"]
+
+def _run_tool(tool: Callable[..., str], tool_args: Dict[str, Any]) -> str:
+    try:
+        return tool(**tool_args)
+    except Exception as e:
+        return f"Error: Tool execution failed: {str(e)}"
+
+def _run_traced_tool(tracer: Tracer, tool_name: str, tool: Callable[..., str], tool_args: Dict[str, Any]) -> str:
+    with tracer.span(f"tool:{tool_name}") as span:
+        result = _run_tool(tool, tool_args)
+        span["error"] = tool_is_error(result)
+        return result
+
+def _execute_tools(
+    tools: Dict[str, Callable[..., str]],
+    calls: List[Tuple[str, Dict[str, Any]]],
+    max_parallel: int,
+    timeout: float,
+    tracer: Tracer = NULL_TRACER,
+) -> List[str]:
+    """
+    Runs at most max_parallel calls at a time and returns their results in call order.
+    Each call gets `timeout` seconds from the moment it starts, not from when it was
+    queued. A call still running after that is reported as an error; its thread cannot
+    be killed, so it keeps running in the background while the next call takes its slot.
+    """
+    slots = max(1, max_parallel)
+    pool = ThreadPoolExecutor(max_workers=len(calls) or 1)
+    try:
+        results: List[Optional[str]] = [None] * len(calls)
+        queued = list(range(len(calls)))[::-1]
+        running: Dict[Any, Tuple[int, float]] = {}  # future -> (call index, deadline)
+        while queued or running:
+            while queued and len(running) < slots:
+                i = queued.pop()
+                tool_name, tool_args = calls[i]
+                future = pool.submit(_run_traced_tool, tracer, tool_name, tools[tool_name], tool_args)
+                running[future] = (i, time.perf_counter() + timeout)
+            next_deadline = min(deadline for _, deadline in running.values())
+            done, _ = wait(running, timeout=max(0.0, next_deadline - time.perf_counter()), return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)[0]] = future.result()
+            now = time.perf_counter()
+            for future, (i, deadline) in list(running.items()):
+                if deadline <= now:
+                    del running[future]
+                    results[i] = f"Error: Tool {calls[i][0]} timed out after {timeout:g}s"
+        return results
+    finally:
+        pool.shutdown(wait=False)
+
+def _finish(state: AgentState, response: str, step_limit: bool = False) -> Dict[str, Any]:
+    """step_limit marks a turn cut off by max_steps, so callers need not match the response text."""
+    state["messages"].append({"role": "assistant", "content": response})
+    state["is_complete"] = True
+    return {"action": "finish", "response": response, "step_limit": step_limit}
+
+# The agent loop is a generator that does no I/O itself. It yields what it needs and
+# the driver (sync run_agent, async run_agent_async) sends back the answer:
+#   ("model", messages)  -> model output text   (first model call of a step)
+#   ("repair", messages) -> model output text   (repair call within the same step)
+#   ("tools", calls)     -> result strings, in call order
+# Drivers time the model, repair and tool work on the tracer; the loop itself adds
+# a "step" span around each step and a "parse" span around each decision parse.
+# Its return value (StopIteration.value) is the final decision.
+StepRequest = Tuple[str, Any]
+
+def agent_steps(
     state: AgentState,
     user_text: str,
-    adapter: ModelAdapter,
+    tools: Dict[str, Callable[..., str]],
     *,
     max_steps: int = 8,
     max_repairs_per_step: int = 2,
-) -> Dict[str, Any]:
+    history: Optional[MessageHistory] = None,
+    verbose: bool = True,
+    tracer: Tracer = NULL_TRACER,
+) -> Generator[StepRequest, Any, Dict[str, Any]]:
     """
     Updates state in place.
-    Logs steps to console for visibility (Thinking -> Action -> Output).
+    Logs steps to console for visibility (Thinking -> Action -> Output) when verbose.
     """
     if not isinstance(state.get("messages"), list):
         state["messages"] = []
     
     state["messages"].append({"role": "user", "content": str(user_text)})
     
-    tools = tool_registry()
-    last_failed_date: Optional[str] = None
-    last_tool_error: Optional[str] = None
-
-    for _ in range(max_steps):
-        messages = _as_messages(state)
-        raw = adapter.complete(messages)
-        decision = _decoder_extract_first_object(raw)
+    # shipment_id -> (date that failed, tool error), so a retry of the same date is stopped
+    failed_dates: Dict[str, Tuple[str, str]] = {}
+    if history is None:
+        history = MessageHistory(SYSTEM_PROMPT)
+
+    def parse(text: str) -> Optional[Dict[str, Any]]:
+        with tracer.span("parse", chars=len(text)):
+            return _decoder_extract_first_object(text)
+
+    for step in range(max_steps):
+        with tracer.span("step", step=step):
+            history.sync(state["messages"])
+            messages = history.messages()
+            raw = yield ("model", messages)
+            decision = parse(raw)
         
-        # Repair logic
-        repairs_left = max_repairs_per_step
-        while decision is None and repairs_left > 0:
-            decision = _repair_json_only(adapter, messages, raw, "No valid JSON object found")
-            repairs_left -= 1
+            # Repair logic
+            repairs_left = max_repairs_per_step
+            while decision is None and repairs_left > 0:
+                decision = parse((yield ("repair", _repair_messages(messages, raw, "No valid JSON object found"))))
+                repairs_left -= 1
             
-        if decision is None:
-            final = {"action": "finish", "response": "Error: model returned no valid JSON"}
-            state["messages"].append({"role": "assistant", "content": final["response"]})
-            state["is_complete"] = True
-            return final
-
-        # Validate logic
-        ok, err = _validate_decision(decision)
-        while not ok and repairs_left > 0:
-            decision2 = _repair_json_only(adapter, messages, json.dumps(decision), err)
-            repairs_left -= 1
-            if decision2 is None:
-                break
-            decision = decision2
+            if decision is None:
+                return _finish(state, "Error: model returned no valid JSON")
+
+            # Validate logic
             ok, err = _validate_decision(decision)
+            while not ok and repairs_left > 0:
+                decision2 = parse((yield ("repair", _repair_messages(messages, json.dumps(decision), err))))
+                repairs_left -= 1
+                if decision2 is None:
+                    break
+                decision = decision2
+                ok, err = _validate_decision(decision)
 
-        if not ok:
-            final = {"action": "finish", "response": f"Error: invalid decision schema: {err}"}
-            state["messages"].append({"role": "assistant", "content": final["response"]})
-            state["is_complete"] = True
-            return final
-
-        # --- EXECUTION LOGIC ---
-
-        if decision["action"] == "finish":          
-            state["messages"].append({"role": "assistant", "content": decision["response"]})
-            state["is_complete"] = True
-            return decision
-
-        # It's a tool call
-        tool_name = decision["tool_name"]
-        tool_args = decision["tool_args"]
-
-        # LOGGING: The "Thinking" step
-        print(f"   [Thinking] I should call {tool_name} with {tool_args}...")
-
-        if tool_name not in tools:
-            final = {"action": "finish", "response": f"Error: unknown tool {tool_name}"}
-            state["messages"].append({"role": "assistant", "content": final["response"]})
-            state["is_complete"] = True
-            return final
-
-        # Normalizing args (hallucination fix)
-        if tool_name == "update_route":
-            if "new_date" not in tool_args:
-                for date_key in ("date", "newDate", "route_date"):
-                    if date_key in tool_args:
-                        tool_args["new_date"] = tool_args[date_key]
-                        break
-            if "shipment_id" not in tool_args and isinstance(state.get("shipment_id"), str) and state["shipment_id"]:
-                tool_args["shipment_id"] = state["shipment_id"]
-        
-        # Guardrail: Prevent infinite loop on same bad input
-        new_date = str(tool_args.get("new_date", "")).strip()
-        if last_failed_date and new_date == last_failed_date:
-            final = {"action": "finish", "response": f"{last_tool_error} Please provide a different valid date."}
-            state["messages"].append({"role": "assistant", "content": final["response"]})
-            state["is_complete"] = True
-            return final
-
-        # Execute Tool
-        try:
-            result = tools[tool_name](**tool_args)
-        except Exception as e:
-            result = f"Error: Tool execution failed: {str(e)}"
-        
-        # LOGGING: The "Output" step
-        print(f"   [Tool Output] {result}")
-
-        # Update state based on tool result
-        if tool_name == "update_route":
-            if tool_is_error(result):
-                last_failed_date = new_date
-                last_tool_error = result
-            else:
-                last_failed_date = None
-                last_tool_error = None
-        
-        # Add tool output to history so the model sees it in the next loop!
-        state["messages"].append({"role": "tool", "content": f"{tool_name} result: {result}"})
+            if not ok:
+                return _finish(state, f"Error: invalid decision schema: {err}")
+
+            # --- EXECUTION LOGIC ---
+
+            if decision["action"] == "finish":          
+                state["messages"].append({"role": "assistant", "content": decision["response"]})
+                state["is_complete"] = True
+                decision["step_limit"] = False  # Same result shape as _finish; the model cannot set it
+                return decision
+
+            # It's a tool call (one, or several independent ones)
+            calls = _decision_calls(decision)
+
+            for tool_name, tool_args in calls:
+                # LOGGING: The "Thinking" step
+                if verbose:
+                    print(f"   [Thinking] I should call {tool_name} with {tool_args}...")
+
+                if tool_name not in tools:
+                    return _finish(state, f"Error: unknown tool {tool_name}")
+
+                _normalize_tool_args(tool_name, tool_args, state)
+
+            # Guardrail: Prevent infinite loop on same bad input (tracked per shipment)
+            blocked: Dict[int, str] = {}
+            for i, (tool_name, tool_args) in enumerate(calls):
+                if tool_name != "update_route":
+                    continue
+                failed = failed_dates.get(str(tool_args.get("shipment_id", "")))
+                if failed and str(tool_args.get("new_date", "")).strip() == failed[0]:
+                    blocked[i] = f"{failed[1]} Please provide a different valid date."
+
+            if len(blocked) == len(calls):
+                return _finish(state, " ".join(blocked[i] for i in range(len(calls))))
+
+            # Execute Tools (the driver runs them concurrently; results come back in call order)
+            runnable = [i for i in range(len(calls)) if i not in blocked]
+            results = dict(blocked)
+            results.update(zip(runnable, (yield ("tools", [calls[i] for i in runnable]))))
+
+            for i, (tool_name, tool_args) in enumerate(calls):
+                result = results[i]
+
+                # LOGGING: The "Output" step
+                if verbose:
+                    print(f"   [Tool Output] {result}")
+
+                # Update state based on tool result
+                if tool_name == "update_route" and i not in blocked:
+                    shipment_id = str(tool_args.get("shipment_id", ""))
+                    if tool_is_error(result):
+                        failed_dates[shipment_id] = (str(tool_args.get("new_date", "")).strip(), result)
+                    else:
+                        failed_dates.pop(shipment_id, None)
+
+                # Add tool output to history so the model sees it in the next loop!
+                # With several calls, the arguments tell the results apart
+                label = tool_name if len(calls) == 1 else f"{tool_name} {json.dumps(tool_args, sort_keys=True)}"
+                state["messages"].append({"role": "tool", "content": f"{label} result: {result}"})
     
     # End of loop
-    final = {"action": "finish", "response": "Error: step limit reached"}
-    state["messages"].append({"role": "assistant", "content": final["response"]})
-    state["is_complete"] = True
-    return final
+    return _finish(state, "Error: step limit reached", step_limit=True)
+
+def _complete(adapter: ModelAdapter, messages: List[Message], stream: bool, tracer: Tracer, kind: str) -> str:
+    with tracer.span(kind, stream=stream) as span:
+        if not stream:
+            raw = adapter.complete(messages)
+        else:
+            chunks = adapter.stream(messages)
+            try:
+                raw, span["cut_off"] = _read_until_first_object(chunks)
+            finally:
+                # Closing the stream stops the generation we no longer need
+                close = getattr(chunks, "close", None)
+                if close is not None:
+                    close()
+        span["chars"] = len(raw)
+        return raw
+
+def run_agent(
+    state: AgentState,
+    user_text: str,
+    adapter: ModelAdapter,
+    *,
+    max_steps: int = 8,
+    max_repairs_per_step: int = 2,
+    history: Optional[MessageHistory] = None,
+    tools: Optional[Dict[str, Callable[..., str]]] = None,
+    max_parallel_tools: int = 4,
+    tool_timeout: float = 30.0,
+    verbose: bool = True,
+    stream: bool = False,
+    tracer: Optional[Tracer] = None,
+) -> Dict[str, Any]:
+    """
+    Updates state in place.
+    Logs steps to console for visibility (Thinking -> Action -> Output).
+    Pass the same MessageHistory for every turn of a session to reuse the already
+    built prompt and, with a token_budget, keep it bounded.
+    Several tool calls in one decision run concurrently (at most max_parallel_tools
+    at a time, each given tool_timeout seconds); results are recorded in call order.
+    With stream=True and an adapter that has stream(), the step acts as soon as the
+    first complete JSON object has arrived and the rest of the output is cut off.
+    A Tracer records step, model, parse, repair and tool spans (see tracing.py).
+    """
+    tools = tool_registry() if tools is None else tools
+    tracer = NULL_TRACER if tracer is None else tracer
+    stream = stream and hasattr(adapter, "stream")
+    steps = agent_steps(
+        state, user_text, tools,
+        max_steps=max_steps, max_repairs_per_step=max_repairs_per_step, history=history, verbose=verbose,
+        tracer=tracer,
+    )
+    reply = None
+    try:
+        while True:
+            kind, payload = steps.send(reply)
+            if kind == "tools":
+                with tracer.span("tools", calls=len(payload)):
+                    reply = _execute_tools(tools, payload, max_parallel_tools, tool_timeout, tracer)
+            else:
+                reply = _complete(adapter, payload, stream, tracer, kind)
+    except StopIteration as stop:
+        return stop.value
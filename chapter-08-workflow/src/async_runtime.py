@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from state import AgentState
+from tools import registry as tool_registry
+from model_adapter import AsyncModelAdapter, Message
+from message_history import MessageHistory
+from decision_parser import StreamingDecisionParser
+from tracing import NULL_TRACER, Tracer
+from agent_runtime import agent_steps, _run_traced_tool
+
+
+async def _execute_tools_async(
+    tools: Dict[str, Callable[..., str]],
+    calls: List[Tuple[str, Dict[str, Any]]],
+    slots: asyncio.Semaphore,
+    timeout: float,
+    tracer: Tracer = NULL_TRACER,
+) -> List[str]:
+    """
+    Runs blocking tools in worker threads without blocking the event loop.
+    `slots` bounds how many run at once; gather keeps the results in call order.
+    """
+    async def run_one(tool_name: str, tool_args: Dict[str, Any]) -> str:
+        async with slots:
+            try:
+                return await asyncio.wait_for(asyncio.to_thread(_run_traced_tool, tracer, tool_name, tools[tool_name], tool_args), timeout)
+            except asyncio.TimeoutError:
+                return f"Error: Tool {tool_name} timed out after {timeout:g}s"
+
+    return list(await asyncio.gather(*(run_one(name, args) for name, args in calls)))
+
+
+async def _complete_async(adapter: AsyncModelAdapter, messages: List[Message], stream: bool, tracer: Tracer,
+                          kind: str) -> str:
+    """Async counterpart of agent_runtime._complete: stops reading at the first complete JSON object."""
+    with tracer.span(kind, stream=stream) as span:
+        if not stream:
+            raw = await adapter.complete(messages)
+        else:
+            parser = StreamingDecisionParser()
+            parts: List[str] = []
+            chunks = adapter.stream(messages)
+            span["cut_off"] = False
+            try:
+                async for chunk in chunks:
+                    parts.append(chunk)
+                    if parser.feed(chunk):
+                        span["cut_off"] = True
+                        break
+            finally:
+                aclose = getattr(chunks, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+            raw = "".join(parts)
+        span["chars"] = len(raw)
+        return raw
+
+
+async def run_agent_async(
+    state: AgentState,
+    user_text: str,
+    adapter: AsyncModelAdapter,
+    *,
+    max_steps: int = 8,
+    max_repairs_per_step: int = 2,
+    history: Optional[MessageHistory] = None,
+    tools: Optional[Dict[str, Callable[..., str]]] = None,
+    max_parallel_tools: int = 4,
+    tool_timeout: float = 30.0,
+    verbose: bool = True,
+    step_latencies: Optional[List[float]] = None,
+    stream: bool = False,
+    tracer: Optional[Tracer] = None,
+) -> Dict[str, Any]:
+    """
+    Async driver of the same step machine as run_agent: while this session waits on
+    the model or its tools, the event loop serves other sessions.
+    If step_latencies is given, the wall time of every step (model call, repairs and
+    tools) is appended to it, in seconds.
+    stream and tracer work as in run_agent; stream needs an async-iterator stream().
+    """
+    tools = tool_registry() if tools is None else tools
+    tracer = NULL_TRACER if tracer is None else tracer
+    stream = stream and hasattr(adapter, "stream")
+    tool_slots = asyncio.Semaphore(max_parallel_tools)
+    steps = agent_steps(
+        state, user_text, tools,
+        max_steps=max_steps, max_repairs_per_step=max_repairs_per_step, history=history, verbose=verbose,
+        tracer=tracer,
+    )
+    reply = None
+    step_started: Optional[float] = None
+    try:
+        while True:
+            kind, payload = steps.send(reply)
+            if kind == "model":
+                now = time.perf_counter()
+                if step_started is not None and step_latencies is not None:
+                    step_latencies.append(now - step_started)
+                step_started = now
+            if kind == "tools":
+                with tracer.span("tools", calls=len(payload)):
+                    reply = await _execute_tools_async(tools, payload, tool_slots, tool_timeout, tracer)
+            else:
+                reply = await _complete_async(adapter, payload, stream, tracer, kind)
+    except StopIteration as stop:
+        if step_started is not None and step_latencies is not None:
+            step_latencies.append(time.perf_counter() - step_started)
+        return stop.value
@@ -0,0 +1,67 @@
+# src/bench_history.py
+# Run from chapter-08-workflow/src:  python bench_history.py --turns 40 --budget 1500
+import argparse
+import contextlib
+import io
+import json
+import re
+import time
+
+from state import AgentState
+from agent_runtime import run_agent, SYSTEM_PROMPT
+from message_history import MessageHistory
+from scripted_adapter import ScriptedAdapter
+
+CHATTER = (
+    "Our warehouse team asked me to double check this because the customer called twice this morning, "
+    "the pallets are already wrapped and the driver is waiting for confirmation at the gate."
+)
+
+def dispatcher_policy(messages):
+    """Simulated model: reschedules the date the user asked for, then confirms at length."""
+    last = messages[-1]["content"]
+    if last.startswith("[tool]"):
+        return json.dumps({
+            "action": "finish",
+            "response": f"Done. {last[len('[tool] '):]} I have also noted the request in the shipment log "
+                        "and the customer will receive the usual confirmation e-mail shortly.",
+        })
+    date = re.search(r"\d{4}-\d{2}-\d{2}", last)
+    return json.dumps({
+        "action": "call_tool",
+        "tool_name": "update_route",
+        "tool_args": {"shipment_id": "LS-2026-X", "new_date": date.group() if date else "2099-01-01"},
+    })
+
+def run_session(turns: int, budget, keep_recent: int = 6):
+    state: AgentState = {"messages": [], "shipment_id": "LS-2026-X", "is_complete": False}
+    history = MessageHistory(SYSTEM_PROMPT, token_budget=budget, keep_recent=keep_recent)
+    adapter = ScriptedAdapter(dispatcher_policy)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for turn in range(turns):
+            day = turn % 28 + 1
+            run_agent(state, f"Please move shipment LS-2026-X to 2099-02-{day:02d}. {CHATTER}", adapter, history=history)
+    return history, time.perf_counter() - start
+
+def run_benchmark(turns: int, budget: int, keep_recent: int):
+    full, full_elapsed = run_session(turns, None, keep_recent)
+    compact, compact_elapsed = run_session(turns, budget, keep_recent)
+
+    print(f"Turns: {turns} | steps: {len(full.step_tokens)} | budget={budget} tokens")
+    print(f"{'step':>5} {'full history':>13} {'compacted':>10}")
+    steps = len(full.step_tokens)
+    for step in sorted({0, steps // 4, steps // 2, 3 * steps // 4, steps - 1}):
+        print(f"{step + 1:5d} {full.step_tokens[step]:13d} {compact.step_tokens[step]:10d}")
+    print(f"Prompt tokens, all steps: {sum(full.step_tokens)} -> {sum(compact.step_tokens)} "
+          f"({compact.compactions} compactions)")
+    print(f"Largest prompt          : {max(full.step_tokens)} -> {max(compact.step_tokens)} tokens")
+    print(f"Runtime overhead        : {1000 * full_elapsed:.1f} ms -> {1000 * compact_elapsed:.1f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prompt tokens per step with and without history compaction.")
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--budget", type=int, default=1500)
+    parser.add_argument("--keep-recent", type=int, default=6)
+    args = parser.parse_args()
+    run_benchmark(args.turns, args.budget, args.keep_recent)
@@ -0,0 +1,93 @@
+# src/bench_sessions.py
+# Run from chapter-08-workflow/src:  python bench_sessions.py --sessions 2000 --model-latency 0.2
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import re
+import time
+
+from agent_runtime import run_agent
+from scripted_adapter import AsyncScriptedAdapter, ScriptedAdapter
+from session_scheduler import Session, SessionScheduler, new_state
+
+def dispatcher_policy(messages):
+    """Simulated model: reschedules when asked for a date, otherwise just answers."""
+    last = messages[-1]["content"]
+    if last.startswith("[tool]"):
+        return json.dumps({"action": "finish", "response": f"Done. {last[len('[tool] '):]}"})
+    date = re.search(r"\d{4}-\d{2}-\d{2}", last)
+    shipment = re.search(r"LS-\d{4}-\d+", last)
+    if date and shipment:
+        return json.dumps({"action": "call_tool", "tool_name": "update_route",
+                           "tool_args": {"shipment_id": shipment.group(), "new_date": date.group()}})
+    return json.dumps({"action": "finish", "response": "You're welcome."})
+
+def make_sessions(count: int):
+    return [
+        Session(
+            session_id=f"s{i}",
+            user_turns=[f"Please move shipment LS-2026-{i} to 2099-04-{i % 28 + 1:02d}.", "Thanks!"],
+            state=new_state(f"LS-2026-{i}"),
+        )
+        for i in range(count)
+    ]
+
+def run_sync_baseline(sessions, model_latency: float) -> float:
+    """The blocking runtime, one session after another: sessions/sec."""
+    def slow_policy(messages):
+        time.sleep(model_latency)
+        return dispatcher_policy(messages)
+
+    adapter = ScriptedAdapter(slow_policy)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for session in sessions:
+            for turn in session.user_turns:
+                result = run_agent(session.state, turn, adapter, verbose=False)
+                assert result["step_limit"] is False, result
+    return len(sessions) / (time.perf_counter() - start)
+
+def run_benchmark(session_count: int, model_latency: float, model_slots: int, baseline_sessions: int):
+    baseline_rate = run_sync_baseline(make_sessions(baseline_sessions), model_latency)
+
+    scheduler = SessionScheduler(
+        AsyncScriptedAdapter(dispatcher_policy, latency=model_latency),
+        max_concurrent_model_calls=model_slots,
+        max_steps_per_session=8,
+    )
+    sessions = make_sessions(session_count)
+    with contextlib.redirect_stdout(io.StringIO()):  # tools print their own DB log lines
+        report = asyncio.run(scheduler.run(sessions))
+
+    # Every turn result says whether max_steps cut it off; a one-step budget cuts the tool turn
+    assert all(r["step_limit"] is False for s in sessions for r in s.results)
+    limited = [Session(session_id="limited", user_turns=sessions[0].user_turns[:1], state=new_state("LS-2026-0"))]
+    tight = SessionScheduler(AsyncScriptedAdapter(dispatcher_policy), max_steps_per_session=1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        tight_report = asyncio.run(tight.run(limited))
+    assert tight_report.step_limited == 1 and limited[0].results[-1]["step_limit"] is True
+
+    latency = report.step_latency_ms()
+    isolated = all(s.state["messages"][0]["content"].endswith(f"LS-2026-{s.session_id[1:]} to "
+                                                               f"2099-04-{int(s.session_id[1:]) % 28 + 1:02d}.")
+                   for s in sessions)
+    print(f"Sessions: {session_count} | model latency={model_latency}s | model slots={model_slots}")
+    print(f"Blocking run_agent, serial ({baseline_sessions} sessions): {baseline_rate:8.1f} sessions/sec")
+    print(f"SessionScheduler                    : {report.sessions_per_second:8.1f} sessions/sec "
+          f"({report.elapsed_seconds:.2f}s)")
+    print(f"Completed / step-limited / failed   : {report.completed} / {report.step_limited} / {report.failed}")
+    print(f"Steps: {report.steps} | model calls: {report.model_calls} | "
+          f"avg wait for a model slot: {1000 * report.model_wait_seconds / max(report.model_calls, 1):.1f} ms")
+    print(f"Step latency p50 / p95 / p99        : {latency['p50']:.1f} / {latency['p95']:.1f} / {latency['p99']:.1f} ms")
+    print(f"Session state isolated              : {isolated}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput of the async session scheduler vs. the blocking runtime.")
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--model-latency", type=float, default=0.2)
+    parser.add_argument("--model-slots", type=int, default=64)
+    parser.add_argument("--baseline-sessions", type=int, default=10)
+    args = parser.parse_args()
+    run_benchmark(args.sessions, args.model_latency, args.model_slots, args.baseline_sessions)
@@ -0,0 +1,162 @@
+# src/bench_streaming.py
+# Run from chapter-08-workflow/src:  python bench_streaming.py --trace agent_trace.json
+import argparse
+import contextlib
+import io
+import json
+import re
+import time
+
+from agent_runtime import run_agent
+from decision_parser import StreamingDecisionParser, extract_first_object
+from scripted_adapter import ScriptedAdapter
+from tracing import Tracer
+
+def legacy_extract_first_object(text):
+    """The previous extractor: raw_decode on a fresh slice after every "{"."""
+    decoder = json.JSONDecoder()
+    start = text.find("{")
+    while start != -1:
+        try:
+            obj, _end = decoder.raw_decode(text[start:])
+            return obj if isinstance(obj, dict) else None
+        except json.JSONDecodeError:
+            start = text.find("{", start + 1)
+    return None
+
+def noisy_output(stray_braces: int) -> str:
+    """Model output with a lot of brace-heavy prose before the actual decision."""
+    prose = "Considering {route} options for {shipment}... " * (stray_braces // 2)
+    decision = {"action": "call_tool", "tool_name": "update_route",
+                "tool_args": {"shipment_id": "LS-2026-1", "new_date": "2099-04-01"}}
+    return prose + json.dumps(decision) + " I picked the first available date."
+
+def bench_parser(sizes, repeats: int):
+    print("Decision parse time (ms) on noisy output")
+    print(f"{'stray {':>8} | {'chars':>8} | {'legacy':>9} | {'streaming':>9} | {'same':>4}")
+    for size in sizes:
+        text = noisy_output(size)
+        timings = []
+        for extract in (legacy_extract_first_object, extract_first_object):
+            start = time.perf_counter()
+            for _ in range(repeats):
+                result = extract(text)
+            timings.append((1000 * (time.perf_counter() - start) / repeats, result))
+        same = timings[0][1] == timings[1][1]
+        print(f"{size:>8} | {len(text):>8} | {timings[0][0]:>9.2f} | {timings[1][0]:>9.2f} | {str(same):>4}")
+
+# Fragments that are not valid JSON and keep an object open, repeated up to the size
+MALFORMED = {
+    "nested broken": '{"step": {"args" {"id": [1, ',
+    "stray quote": 'route "A {"k": {"v" ',
+    "unterminated": '{"note": [{"a": 1, ',
+}
+
+def malformed_output(kind: str, size: int) -> str:
+    """Model output full of broken or unclosed JSON fragments before the actual decision."""
+    unit = MALFORMED[kind]
+    body = (unit * (size // len(unit) + 1))[:size]
+    if kind == "stray quote":
+        body = 'He said "' + body
+    decision = {"action": "call_tool", "tool_name": "update_route",
+                "tool_args": {"shipment_id": "LS-2026-1", "new_date": "2099-04-01"}}
+    return body + json.dumps(decision)
+
+def stream_first_object(text: str, chunk_size: int = 64):
+    parser = StreamingDecisionParser()
+    for i in range(0, len(text), chunk_size):
+        objects = parser.feed(text[i:i + chunk_size])
+        if objects:
+            return objects[0]
+    objects = parser.finish()
+    return objects[0] if objects else None
+
+def bench_malformed(sizes, repeats: int):
+    print("\nDecision parse time (ms) on malformed JSON fragments")
+    print(f"{'case':<14} | {'chars':>8} | {'legacy':>9} | {'streaming':>9} | {'chunked':>9} | {'same':>4}")
+    totals = [0.0, 0.0]
+    for size in sizes:
+        for kind in MALFORMED:
+            text = malformed_output(kind, size)
+            timings = []
+            for extract in (legacy_extract_first_object, extract_first_object, stream_first_object):
+                start = time.perf_counter()
+                for _ in range(repeats):
+                    result = extract(text)
+                timings.append((1000 * (time.perf_counter() - start) / repeats, result))
+            same = timings[0][1] == timings[1][1] == timings[2][1]
+            assert same, f"parsers disagree on {kind} ({size} chars)"
+            totals[0] += timings[0][0]
+            totals[1] += timings[1][0]
+            print(f"{kind:<14} | {len(text):>8} | {timings[0][0]:>9.2f} | {timings[1][0]:>9.2f} | "
+                  f"{timings[2][0]:>9.2f} | {str(same):>4}")
+    print(f"{'total':<14} | {'':>8} | {totals[0]:>9.2f} | {totals[1]:>9.2f} |")
+    assert totals[1] <= totals[0], "extract_first_object is slower than the old parser on malformed output"
+
+def chatty_policy(trailing_chars: int):
+    """Simulated model that writes its decision first and keeps explaining after it."""
+    trailer = "\n\nExplanation: " + ("the carrier confirmed capacity on that lane; " * 64)[:trailing_chars]
+
+    def policy(messages):
+        last = messages[-1]["content"]
+        if last.startswith("[tool]"):
+            decision = {"action": "finish", "response": f"Done. {last[len('[tool] '):]}"}
+        else:
+            date = re.search(r"\d{4}-\d{2}-\d{2}", last)
+            decision = {"action": "call_tool", "tool_name": "update_route",
+                        "tool_args": {"shipment_id": "LS-2026-1", "new_date": date.group() if date else "2099-04-01"}}
+        return json.dumps(decision) + trailer
+    return policy
+
+class FullOutputAdapter:
+    """Non-streaming view of a streaming adapter: complete() waits for the whole generation."""
+
+    def __init__(self, adapter: ScriptedAdapter):
+        self.adapter = adapter
+
+    def complete(self, messages):
+        return "".join(self.adapter.stream(messages))
+
+def bench_agent(turns: int, trailing_chars: int, chunk_size: int, chunk_delay: float, trace_path):
+    print(f"\nAgent turns: {turns} | trailing text: {trailing_chars} chars | "
+          f"{chunk_size} chars per chunk every {1000 * chunk_delay:g} ms")
+    print(f"{'mode':<12} | {'s/turn':>7} | {'chars read':>10} | {'steps cut off':>13}")
+    tracer = None
+    for stream in (False, True):
+        scripted = ScriptedAdapter(chatty_policy(trailing_chars), chunk_size=chunk_size, chunk_delay=chunk_delay)
+        adapter = scripted if stream else FullOutputAdapter(scripted)
+        tracer = Tracer()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):  # tools print their own DB log lines
+            for i in range(turns):
+                state = {"messages": [], "shipment_id": "LS-2026-1", "is_complete": False}
+                run_agent(state, f"Move LS-2026-1 to 2099-04-{i % 28 + 1:02d}.", adapter,
+                          verbose=False, stream=stream, tracer=tracer)
+        per_turn = (time.perf_counter() - start) / turns
+        cut_off = sum(1 for e in tracer.events if e["name"] == "model" and e["args"].get("cut_off"))
+        model_calls = sum(1 for e in tracer.events if e["name"] == "model")
+        print(f"{'streaming' if stream else 'full output':<12} | {per_turn:>7.3f} | "
+              f"{scripted.streamed_chars:>10} | {cut_off:>6} / {model_calls:<6}")
+
+    print("\nWhere the streaming run spent its time (per span)")
+    print(f"{'span':<22} | {'count':>6} | {'total ms':>9} | {'mean ms':>8}")
+    for name, entry in sorted(tracer.summary().items(), key=lambda kv: -kv[1]["total_ms"]):
+        print(f"{name:<22} | {entry['count']:>6} | {entry['total_ms']:>9.1f} | {entry['mean_ms']:>8.3f}")
+    if trace_path:
+        tracer.export_chrome_trace(trace_path)
+        print(f"\nChrome trace written to {trace_path} (open in chrome://tracing or ui.perfetto.dev)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Streaming decision parser, early cut-off and per-step tracing.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000, 20000])
+    parser.add_argument("--malformed-sizes", type=int, nargs="+", default=[20000, 80000, 320000])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--trailing-chars", type=int, default=1500)
+    parser.add_argument("--chunk-size", type=int, default=4)
+    parser.add_argument("--chunk-delay", type=float, default=0.002)
+    parser.add_argument("--trace", default=None, help="Write the streaming run as a Chrome trace JSON file")
+    args = parser.parse_args()
+    bench_parser(args.sizes, args.repeats)
+    bench_malformed(args.malformed_sizes, args.repeats)
+    bench_agent(args.turns, args.trailing_chars, args.chunk_size, args.chunk_delay, args.trace)
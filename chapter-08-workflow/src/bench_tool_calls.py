@@ -0,0 +1,77 @@
+# src/bench_tool_calls.py
+# Run from chapter-08-workflow/src:  python bench_tool_calls.py --shipments 5 --tool-latency 0.2
+import argparse
+import contextlib
+import io
+import json
+import re
+import time
+
+from state import AgentState
+from agent_runtime import run_agent
+from scripted_adapter import ScriptedAdapter
+from tools import tool_update_route
+
+def make_tools(tool_latency: float):
+    """The real update_route, slowed down like a call to a remote TMS."""
+    def slow_update_route(shipment_id: str, new_date: str) -> str:
+        time.sleep(tool_latency)
+        return tool_update_route(shipment_id, new_date)
+    return {"update_route": slow_update_route}
+
+def one_call_per_step(shipments, model_latency: float):
+    """Simulated model limited to the old schema: one tool call per round trip."""
+    def policy(messages):
+        time.sleep(model_latency)
+        done = sum(1 for m in messages if m["content"].startswith("[tool]"))
+        if done < len(shipments):
+            return json.dumps({"action": "call_tool", "tool_name": "update_route",
+                               "tool_args": {"shipment_id": shipments[done], "new_date": "2099-03-01"}})
+        return json.dumps({"action": "finish", "response": f"Moved {len(shipments)} shipments."})
+    return policy
+
+def batched_calls(shipments, model_latency: float):
+    """Simulated model using tool_calls: every shipment in one round trip."""
+    def policy(messages):
+        time.sleep(model_latency)
+        if not messages[-1]["content"].startswith("[tool]"):
+            return json.dumps({"action": "call_tool", "tool_calls": [
+                {"tool_name": "update_route", "tool_args": {"shipment_id": s, "new_date": "2099-03-01"}}
+                for s in shipments
+            ]})
+        return json.dumps({"action": "finish", "response": f"Moved {len(shipments)} shipments."})
+    return policy
+
+def run_once(policy, tools, max_parallel: int):
+    state: AgentState = {"messages": [], "shipment_id": None, "is_complete": False}
+    adapter = ScriptedAdapter(policy)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        final = run_agent(state, "Move all five glassware shipments to 2099-03-01.", adapter,
+                          tools=tools, max_steps=16, max_parallel_tools=max_parallel)
+    tool_results = [m["content"] for m in state["messages"] if m["role"] == "tool"]
+    assert final["step_limit"] is False, final
+    return time.perf_counter() - start, adapter.calls, tool_results, final
+
+def run_benchmark(shipment_count: int, model_latency: float, tool_latency: float, max_parallel: int):
+    shipments = [f"LS-2026-{i:03d}" for i in range(shipment_count)]
+    tools = make_tools(tool_latency)
+
+    serial = run_once(one_call_per_step(shipments, model_latency), tools, max_parallel)
+    batched = run_once(batched_calls(shipments, model_latency), tools, max_parallel)
+
+    print(f"Shipments: {shipment_count} | model latency={model_latency}s | tool latency={tool_latency}s "
+          f"| max_parallel_tools={max_parallel}")
+    for name, (elapsed, calls, results, final) in (("one call per step", serial), ("tool_calls batch", batched)):
+        print(f"{name:<18}: {elapsed:6.2f}s | model round trips: {calls} | tool results: {len(results)} "
+              f"| {final['response']}")
+    print("Result order (batch):", [re.search(r"LS-\d{4}-\d{3}", r).group() for r in batched[2]])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="One tool call per step vs. concurrent tool_calls in one step.")
+    parser.add_argument("--shipments", type=int, default=5)
+    parser.add_argument("--model-latency", type=float, default=0.5)
+    parser.add_argument("--tool-latency", type=float, default=0.2)
+    parser.add_argument("--max-parallel", type=int, default=4)
+    args = parser.parse_args()
+    run_benchmark(args.shipments, args.model_latency, args.tool_latency, args.max_parallel)
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# Braces, quotes and backslashes are ASCII and never occur inside multi-byte UTF-8
+# sequences, so the scan can run on bytes and jump between them with a regex.
+# A string is consumed in one match (up to the end of the buffer if it is still open)
+_STRUCTURAL = re.compile(rb'[{}]|"[^"\\]*(?:\\.[^"\\]*)*(")?')
+_STRING_SPECIAL = re.compile(rb'["\\]')
+# An object starts with "{", JSON whitespace, then a key or "}". Any other "{" (prose
+# such as "{route}") is rejected by raw_decode right away, so it is not a candidate.
+_OBJECT_START = re.compile(rb'\{[ \t\n\r]*(?:["}]|\Z)')
+_TEXT_OBJECT_START = re.compile(_OBJECT_START.pattern.decode())
+_DECODER = json.JSONDecoder()
+
+
+# Longest token an error can point at the start of (literals such as -Infinity, \uXXXX escapes)
+_TOKEN_SLACK = 16
+
+
+def _ran_out_of_text(err: json.JSONDecodeError) -> bool:
+    """True when parsing may have failed only because the text stops, i.e. more output could fix it."""
+    return err.pos >= len(err.doc) - _TOKEN_SLACK or err.msg.startswith("Unterminated string")
+
+
+def _decode_at(text: str, i: int) -> Tuple[Optional[Dict[str, Any]], int, Optional[json.JSONDecodeError]]:
+    """
+    raw_decode of the object at text[i], as (object, end offset, error).
+
+    The parse runs on a window that grows only while the error sits at its cut, so a
+    candidate that fails early costs what it parsed, not the length of the text. (A
+    JSONDecodeError also counts the newlines before its position in the whole document.)
+    """
+    size = 1024
+    while True:
+        window = text[i:i + size]
+        try:
+            obj, end = _DECODER.raw_decode(window)
+            return obj, i + end, None
+        except json.JSONDecodeError as err:
+            if i + size >= len(text) or not _ran_out_of_text(err):
+                return None, i, err
+            size *= 4
+
+
+class StreamingDecisionParser:
+    """
+    Finds JSON objects in model output as it streams in, in one linear pass.
+
+    Text outside objects is skipped with find("{") (and a "{" that cannot start an
+    object is skipped right there); inside an object only braces
+    and quotes are looked at, with strings (and escapes inside them) tracked so a
+    "}" in a string does not close anything. Each top-level object is parsed once,
+    when its closing brace arrives, and only the bytes of the open object are kept.
+
+    Only when a top-level candidate is not valid JSON (prose such as "{note: ...}"
+    or a stray quote) does it fall back to trying raw_decode at every later "{",
+    like the old extractor, so noisy outputs still yield the same object. If that
+    has to wait for more output, it resumes at the candidate that ran out of text,
+    and only once a "}" has arrived and the text has grown by an eighth, so
+    garbage output cannot make every chunk re-parse everything before it.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._pos = 0
+        self._stack: List[int] = []  # Offsets of the currently open "{"
+        self._in_string = False
+        self._waiting: Optional[int] = None  # Length of an invalid candidate whose fallback needs more text
+        self._retry_at = 1  # Character offset (from the waiting candidate) of the first "{" not yet ruled out
+        self._retry_len = 0  # Buffer length at the last fallback attempt
+        self._closed = False  # A "}" arrived since then
+
+    def _fallback(self, start: int, stop: Optional[int], final: bool) -> Tuple[Optional[Dict[str, Any]], int, bool]:
+        """
+        First object that parses at a "{" inside the invalid candidate buf[start:stop]
+        (stop=None: up to the end): (object, offset to resume scanning at, waiting).
+        waiting means an attempt ran out of text; unless final, the answer depends on
+        output that has not arrived yet.
+        """
+        resuming = self._waiting is not None
+        text = self._buf[start:None if resuming else stop].decode("utf-8")
+        whole = resuming or stop is None
+        limit = len(self._buf[start:stop].decode("utf-8")) if resuming and stop is not None else len(text)
+        candidate = _TEXT_OBJECT_START.search(text, self._retry_at if resuming else 1)
+        while candidate is not None and candidate.start() < limit:
+            i = candidate.start()
+            obj, end, err = _decode_at(text, i)
+            if err is None:
+                return obj, start + len(text[:end].encode("utf-8")), False
+            if _ran_out_of_text(err):
+                if not whole:
+                    # A stray quote hid where this object really ends: retry on all the text there is
+                    text, whole = self._buf[start:].decode("utf-8"), True
+                    continue
+                if not final:
+                    self._retry_at = i
+                    return None, start, True
+            candidate = _TEXT_OBJECT_START.search(text, i + 1)
+        return None, len(self._buf) if stop is None else stop, False
+
+    def _settle(self, start: int, stop: int, found: List[Dict[str, Any]]) -> int:
+        """Runs the fallback for the invalid candidate buf[start:stop]; returns where scanning resumes."""
+        if self._waiting is None and self._buf.find(b"{", start + 1, stop) == -1:
+            # No "{" inside to try
+            self._stack = []
+            self._in_string = False
+            return stop
+        obj, resume, waiting = self._fallback(start, stop, final=False)
+        if waiting:
+            # Retried as more output arrives until decided: slower, but only for garbage output
+            self._stack = [start]
+            self._waiting = stop - start
+            self._retry_len = len(self._buf) - start
+            self._closed = False
+            return len(self._buf)
+        self._stack = []
+        self._waiting = None
+        self._retry_at = 1
+        self._in_string = False
+        if obj is not None:
+            found.append(obj)
+        return resume
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Consumes the next piece of output; returns the objects it completed, in order."""
+        buf = self._buf
+        buf += chunk.encode("utf-8")
+        found: List[Dict[str, Any]] = []
+        pos = self._pos
+        if self._waiting is not None:
+            self._closed = self._closed or "}" in chunk
+            pending = len(buf) - self._stack[0]
+            if not (self._closed and pending >= self._retry_len + self._retry_len // 8):
+                self._pos = len(buf)
+                return found  # Nothing new can complete yet
+            pos = self._settle(self._stack[0], self._stack[0] + self._waiting, found)
+        while pos < len(buf) and self._waiting is None:
+            if not self._stack:
+                start = buf.find(b"{", pos)
+                if start == -1:
+                    pos = len(buf)
+                    break
+                pos = start + 1
+                if _OBJECT_START.match(buf, start):
+                    self._stack.append(start)
+            elif self._in_string:
+                match = _STRING_SPECIAL.search(buf, pos)
+                if match is None:
+                    pos = len(buf)
+                elif match.group() == b"\\":
+                    if match.end() == len(buf):
+                        pos = match.start()  # Escaped char is in the next chunk
+                        break
+                    pos = match.end() + 1
+                else:
+                    self._in_string = False
+                    pos = match.end()
+            else:
+                match = _STRUCTURAL.search(buf, pos)
+                if match is None:
+                    pos = len(buf)
+                    break
+                pos = match.end()
+                token = buf[match.start()]
+                if token == 0x22:  # '"'
+                    # Left open: the rest of it (or an escape cut by the chunk) is read as it arrives
+                    self._in_string = match.group(1) is None
+                elif token == 0x7B:  # "{"
+                    self._stack.append(match.start())
+                elif len(self._stack) > 1:
+                    self._stack.pop()
+                else:
+                    try:
+                        found.append(_DECODER.decode(buf[self._stack[0]:pos].decode("utf-8")))
+                        self._stack = []
+                    except ValueError:
+                        pos = self._settle(self._stack[0], pos, found)
+
+        # Keep only the bytes of the object still open
+        drop = self._stack[0] if self._stack else pos
+        if drop:
+            del buf[:drop]
+            self._stack = [s - drop for s in self._stack]
+            pos -= drop
+        self._pos = pos
+        return found
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """End of output: an object left open can still contain a complete one."""
+        obj = self._fallback(self._stack[0], None, final=True)[0] if self._stack else None
+        self.__init__()
+        return [obj] if obj is not None else []
+
+
+def extract_first_object(text: str) -> Optional[Dict[str, Any]]:
+    """
+    First JSON object in a complete model output, or None.
+
+    With the whole output at hand there is nothing to scan incrementally: this is the
+    old raw_decode at every "{", minus the ones that cannot start an object, and with
+    each attempt reading only the text it parses instead of a copy of the rest.
+    """
+    candidate = _TEXT_OBJECT_START.search(text)
+    while candidate is not None:
+        obj, _end, err = _decode_at(text, candidate.start())
+        if err is None:
+            return obj
+        candidate = _TEXT_OBJECT_START.search(text, candidate.start() + 1)
+    return None
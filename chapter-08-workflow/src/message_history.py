@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+Message = Dict[str, str]
+
+# Rough per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+@lru_cache(maxsize=None)
+def _encoder():
+    try:
+        import tiktoken  # Optional: exact token counts when available
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Token count with tiktoken if installed, otherwise the usual ~4 chars/token estimate."""
+    encoder = _encoder()
+    if encoder is not None:
+        return len(encoder.encode(text))
+    return max(1, len(text) // 4) if text else 0
+
+
+def to_message(m: Any) -> Message:
+    """Converts one state entry to a chat message (non-chat roles are folded into user turns)."""
+    if isinstance(m, dict) and "role" in m and "content" in m:
+        role = str(m["role"])
+        content = str(m["content"])
+        if role in {"system", "user", "assistant"}:
+            return {"role": role, "content": content}
+        return {"role": "user", "content": f"[{role}] {content}"}
+    return {"role": "user", "content": str(m)}
+
+
+def _kind(m: Any) -> str:
+    return "tool" if isinstance(m, dict) and m.get("role") == "tool" else "chat"
+
+
+class MessageHistory:
+    """
+    Chat history for the model, built incrementally from state["messages"].
+
+    sync() converts only the state entries added since the previous call and keeps
+    a running token count, so a step costs O(new messages) instead of O(history).
+
+    With a token_budget, going over it compacts everything except the system prompt
+    and the last `keep_recent` messages: tool results stay verbatim (the model needs
+    the exact errors and confirmations), while user/assistant chatter is folded into
+    one short summary message.
+    """
+    def __init__(
+        self,
+        system_prompt: str,
+        token_budget: Optional[int] = None,
+        keep_recent: int = 6,
+        summary_chars: int = 120,
+        max_summary_lines: int = 12,
+    ):
+        self.token_budget = token_budget
+        self.keep_recent = keep_recent
+        self.summary_chars = summary_chars
+        self.max_summary_lines = max_summary_lines
+        self._system = {"role": "system", "content": system_prompt}
+        self._system_tokens = count_tokens(system_prompt) + MESSAGE_OVERHEAD_TOKENS
+        self._reset()
+        self.compactions = 0
+        self.step_tokens: List[int] = []  # Prompt size of every messages() call, for reporting
+
+    def _reset(self):
+        self._messages: List[Message] = []
+        self._tokens: List[int] = []
+        self._kinds: List[str] = []  # "chat", "tool" or "summary"
+        self._summary_lines: List[str] = []
+        self._summarized = 0
+        self._consumed = 0
+        self.total_tokens = self._system_tokens
+
+    def _append(self, message: Message, kind: str, tokens: Optional[int] = None):
+        if tokens is None:
+            tokens = count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+        self._messages.append(message)
+        self._tokens.append(tokens)
+        self._kinds.append(kind)
+        self.total_tokens += tokens
+
+    def sync(self, state_messages: List[Any]):
+        """Appends the state entries not seen yet; rebuilds if the state history was replaced."""
+        if len(state_messages) < self._consumed:
+            self._reset()
+        for m in state_messages[self._consumed:]:
+            self._append(to_message(m), _kind(m))
+        self._consumed = len(state_messages)
+        if self.token_budget is not None and self.total_tokens > self.token_budget:
+            self._compact()
+
+    def _summary_message(self) -> Message:
+        lines = self._summary_lines
+        hidden = self._summarized - len(lines)
+        header = f"[summary] Earlier conversation, condensed ({self._summarized} messages"
+        header += f", {hidden} not shown):" if hidden > 0 else "):"
+        return {"role": "user", "content": "\n".join([header] + lines)}
+
+    def _compact(self):
+        cut = len(self._messages) - self.keep_recent
+        if cut <= 0 or "chat" not in self._kinds[:cut]:
+            return  # Nothing left to condense; tool results are never dropped
+        kept = []
+        for message, kind, tokens in zip(self._messages[:cut], self._kinds[:cut], self._tokens[:cut]):
+            if kind == "summary":
+                continue  # Rebuilt below from _summary_lines
+            if kind == "tool":
+                kept.append((message, kind, tokens))
+            else:
+                text = " ".join(message["content"].split())
+                if len(text) > self.summary_chars:
+                    text = text[:self.summary_chars].rstrip() + "..."
+                self._summary_lines.append(f"- {message['role']}: {text}")
+                self._summarized += 1
+        # Only the newest lines are shown, so older ones are not kept either
+        overflow = len(self._summary_lines) - self.max_summary_lines
+        if overflow > 0:
+            del self._summary_lines[:overflow]
+
+        kept += zip(self._messages[cut:], self._kinds[cut:], self._tokens[cut:])
+        self._messages, self._tokens, self._kinds = [], [], []
+        self.total_tokens = self._system_tokens
+        self._append(self._summary_message(), "summary")
+        for message, kind, tokens in kept:
+            self._append(message, kind, tokens)
+        self.compactions += 1
+
+    def messages(self) -> List[Message]:
+        """The prompt for the next model call (a new list; safe to extend)."""
+        self.step_tokens.append(self.total_tokens)
+        return [self._system] + self._messages
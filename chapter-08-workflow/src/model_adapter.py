@@ -1,7 +1,7 @@
 # src/model_adapter.py
 from __future__ import annotations
 
-from typing import Protocol, List, Dict
+from typing import AsyncIterator, Iterator, Protocol, List, Dict
 
 
 Message = Dict[str, str]
@@ -14,3 +14,28 @@ class ModelAdapter(Protocol):
         Must not raise on normal model failures, return best effort text instead.
         """
         ...
+
+
+class AsyncModelAdapter(Protocol):
+    async def complete(self, messages: List[Message]) -> str:
+        """
+        Async counterpart of ModelAdapter.complete, for the async runtime.
+        Same contract: must not raise on normal model failures.
+        """
+        ...
+
+
+class StreamingModelAdapter(ModelAdapter, Protocol):
+    def stream(self, messages: List[Message]) -> Iterator[str]:
+        """
+        Yields the model output in chunks as it is generated.
+        The runtime stops iterating once it has a decision and closes the iterator,
+        which must stop the generation. Same failure contract as complete().
+        """
+        ...
+
+
+class AsyncStreamingModelAdapter(AsyncModelAdapter, Protocol):
+    def stream(self, messages: List[Message]) -> AsyncIterator[str]:
+        """Async counterpart of StreamingModelAdapter.stream (an async generator, closed with aclose())."""
+        ...
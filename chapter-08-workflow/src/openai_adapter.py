@@ -1,11 +1,14 @@
 # src/openai_adapter.py
 import os
-from typing import List, Dict
-from openai import OpenAI
+from typing import AsyncIterator, Iterator, List, Dict
+from openai import AsyncOpenAI, OpenAI
 
 # Each message is represented as {"role": "...", "content": "..."}.
 Message = Dict[str, str]
 
+NO_API_KEY_RESPONSE = '{"action":"finish","response":"Error: OPENAI_API_KEY environment variable is not set."}'
+MODEL_FAILED_RESPONSE = '{"action":"finish","response":"Error: model call failed. Check API key and connectivity."}'
+
 
 class OpenAIAdapter:
     """Adapter that wraps OpenAI Chat Completions for the workflow runtime."""
@@ -22,7 +25,7 @@ class OpenAIAdapter:
         # Fail fast with valid JSON when no API key is configured.
         if not self.api_key or self.client is None:
             # Return valid JSON so the agent runtime can finish gracefully.
-            return '{"action":"finish","response":"Error: OPENAI_API_KEY environment variable is not set."}'
+            return NO_API_KEY_RESPONSE
 
         try:
             resp = self.client.chat.completions.create(
@@ -35,4 +38,86 @@ class OpenAIAdapter:
             return resp.choices[0].message.content or ""
         except Exception:
             # Return valid JSON to avoid breaking the runtime on model failures.
-            return '{"action":"finish","response":"Error: model call failed. Check API key and connectivity."}'
+            return MODEL_FAILED_RESPONSE
+
+    def stream(self, messages: List[Message]) -> Iterator[str]:
+        if not self.api_key or self.client is None:
+            yield NO_API_KEY_RESPONSE
+            return
+
+        try:
+            chunks = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=self.temperature,
+                response_format={"type": "json_object"},
+                stream=True,
+            )
+        except Exception:
+            yield MODEL_FAILED_RESPONSE
+            return
+
+        try:
+            for chunk in chunks:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception:
+            # Mid-stream failure: the runtime still finds this object after the partial text
+            yield MODEL_FAILED_RESPONSE
+        finally:
+            # Runs when the runtime closes us early too: drops the HTTP response, ending the generation
+            chunks.close()
+
+
+class AsyncOpenAIAdapter:
+    """
+    Async twin of OpenAIAdapter for the async runtime and the session scheduler.
+    One instance (and its HTTP connection pool) is meant to be shared by many sessions.
+    """
+
+    def __init__(self, model: str = "gpt-4o", temperature: float = 0.1, max_retries: int = 2):
+        self.api_key = (os.getenv("OPENAI_API_KEY") or "").strip()
+        self.client = AsyncOpenAI(api_key=self.api_key, max_retries=max_retries) if self.api_key else None
+        self.model = model
+        self.temperature = temperature
+
+    async def complete(self, messages: List[Message]) -> str:
+        if not self.api_key or self.client is None:
+            return NO_API_KEY_RESPONSE
+
+        try:
+            resp = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=self.temperature,
+                response_format={"type": "json_object"},
+            )
+            return resp.choices[0].message.content or ""
+        except Exception:
+            return MODEL_FAILED_RESPONSE
+
+    async def stream(self, messages: List[Message]) -> AsyncIterator[str]:
+        if not self.api_key or self.client is None:
+            yield NO_API_KEY_RESPONSE
+            return
+
+        try:
+            chunks = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=self.temperature,
+                response_format={"type": "json_object"},
+                stream=True,
+            )
+        except Exception:
+            yield MODEL_FAILED_RESPONSE
+            return
+
+        try:
+            async for chunk in chunks:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception:
+            yield MODEL_FAILED_RESPONSE
+        finally:
+            await chunks.close()
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import AsyncIterator, Callable, Iterator, List, Dict, Sequence, Union
+
+# Each message is represented as {"role": "...", "content": "..."}.
+Message = Dict[str, str]
+
+EXHAUSTED = '{"action":"finish","response":"Error: scripted adapter has no more responses."}'
+
+
+class ScriptedAdapter:
+    """
+    Offline ModelAdapter for demos and benchmarks: no API key, no network.
+
+    `script` is either a list of canned outputs returned in order, or a function
+    that receives the prompt messages and returns the output (a simulated policy).
+    stream() hands the same output out in `chunk_size`-character chunks, one every
+    `chunk_delay` seconds (a simulated token rate); `streamed_chars` counts what
+    the caller actually read.
+    """
+
+    def __init__(self, script: Union[Sequence[str], Callable[[List[Message]], str]],
+                 chunk_size: int = 16, chunk_delay: float = 0.0):
+        self.script = script
+        self.calls = 0
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.streamed_chars = 0
+
+    def complete(self, messages: List[Message]) -> str:
+        self.calls += 1
+        if callable(self.script):
+            return self.script(messages)
+        if self.calls <= len(self.script):
+            return self.script[self.calls - 1]
+        return EXHAUSTED
+
+    def stream(self, messages: List[Message]) -> Iterator[str]:
+        text = ScriptedAdapter.complete(self, messages)
+        for i in range(0, len(text), self.chunk_size):
+            if self.chunk_delay > 0:
+                time.sleep(self.chunk_delay)
+            chunk = text[i:i + self.chunk_size]
+            self.streamed_chars += len(chunk)
+            yield chunk
+
+
+class AsyncScriptedAdapter(ScriptedAdapter):
+    """Async variant with a simulated model latency, for the async runtime and scheduler benchmarks."""
+
+    def __init__(self, script: Union[Sequence[str], Callable[[List[Message]], str]], latency: float = 0.0,
+                 chunk_size: int = 16, chunk_delay: float = 0.0):
+        super().__init__(script, chunk_size=chunk_size, chunk_delay=chunk_delay)
+        self.latency = latency
+
+    async def complete(self, messages: List[Message]) -> str:
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+        return ScriptedAdapter.complete(self, messages)
+
+    async def stream(self, messages: List[Message]) -> AsyncIterator[str]:
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+        text = ScriptedAdapter.complete(self, messages)
+        for i in range(0, len(text), self.chunk_size):
+            if self.chunk_delay > 0:
+                await asyncio.sleep(self.chunk_delay)
+            chunk = text[i:i + self.chunk_size]
+            self.streamed_chars += len(chunk)
+            yield chunk
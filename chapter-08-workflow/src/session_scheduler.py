@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import asyncio
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional
+
+from state import AgentState
+from tools import registry as tool_registry
+from model_adapter import AsyncModelAdapter, Message
+from message_history import MessageHistory
+from agent_runtime import SYSTEM_PROMPT
+from async_runtime import run_agent_async
+from tracing import Tracer
+
+
+def new_state(shipment_id: Optional[str] = None) -> AgentState:
+    return {"messages": [], "shipment_id": shipment_id, "is_complete": False}
+
+
+@dataclass
+class Session:
+    """One conversation: its own state and history, never shared with other sessions."""
+    session_id: str
+    user_turns: List[str]
+    state: AgentState = field(default_factory=new_state)
+    history: Optional[MessageHistory] = None
+    steps_used: int = 0
+    results: List[Dict[str, Any]] = field(default_factory=list)
+    step_limited: bool = False
+    error: Optional[str] = None
+
+
+@dataclass
+class SchedulerReport:
+    """Outcome of one SessionScheduler.run() call."""
+    sessions: int
+    completed: int = 0
+    step_limited: int = 0
+    failed: int = 0
+    steps: int = 0
+    model_calls: int = 0
+    elapsed_seconds: float = 0.0
+    step_latencies: List[float] = field(default_factory=list, repr=False)
+    model_wait_seconds: float = 0.0  # Time spent queueing for a free model slot
+
+    @property
+    def sessions_per_second(self) -> float:
+        return self.sessions / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+    def step_latency_ms(self) -> Dict[str, float]:
+        if not self.step_latencies:
+            return {}
+        ordered = sorted(self.step_latencies)
+        pick = lambda pct: 1000 * ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+        return {"p50": pick(50), "p95": pick(95), "p99": pick(99), "mean": 1000 * statistics.fmean(ordered)}
+
+
+class _LimitedAdapter:
+    """Shares one model client between all sessions, with at most `limit` calls in flight."""
+
+    def __init__(self, adapter: AsyncModelAdapter, limit: int, report: SchedulerReport):
+        self._adapter = adapter
+        self._slots = asyncio.Semaphore(limit)
+        self._report = report
+
+    async def complete(self, messages: List[Message]) -> str:
+        queued = time.perf_counter()
+        async with self._slots:
+            self._report.model_wait_seconds += time.perf_counter() - queued
+            self._report.model_calls += 1
+            return await self._adapter.complete(messages)
+
+    async def stream(self, messages: List[Message]) -> AsyncIterator[str]:
+        """Holds a slot until the stream is read to the end or closed (the runtime closes it at cut-off)."""
+        queued = time.perf_counter()
+        async with self._slots:
+            self._report.model_wait_seconds += time.perf_counter() - queued
+            self._report.model_calls += 1
+            chunks = self._adapter.stream(messages)
+            try:
+                async for chunk in chunks:
+                    yield chunk
+            finally:
+                aclose = getattr(chunks, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+
+
+class SessionScheduler:
+    """
+    Interleaves many agent sessions on one event loop.
+
+    Every session runs the async runtime with its own AgentState and MessageHistory.
+    The model client is shared and limited to `max_concurrent_model_calls`, and at
+    most `max_active_sessions` sessions are in progress at a time. A session may use
+    at most `max_steps_per_session` steps over all its turns; when they run out it is
+    stopped and marked step_limited.
+
+    stream and tracer are passed on to every run_agent_async call; stream is only
+    used when the adapter has an async stream().
+    """
+
+    def __init__(
+        self,
+        adapter: AsyncModelAdapter,
+        *,
+        max_concurrent_model_calls: int = 32,
+        max_active_sessions: int = 1000,
+        max_steps_per_session: int = 16,
+        history_budget: Optional[int] = None,
+        tools: Optional[Dict[str, Callable[..., str]]] = None,
+        tool_timeout: float = 30.0,
+        verbose: bool = False,
+        stream: bool = False,
+        tracer: Optional[Tracer] = None,
+    ):
+        self.adapter = adapter
+        self.max_concurrent_model_calls = max_concurrent_model_calls
+        self.max_active_sessions = max_active_sessions
+        self.max_steps_per_session = max_steps_per_session
+        self.history_budget = history_budget
+        self.tools = tool_registry() if tools is None else tools
+        self.tool_timeout = tool_timeout
+        self.verbose = verbose
+        self.stream = stream and hasattr(adapter, "stream")
+        self.tracer = tracer
+
+    async def _run_session(self, session: Session, model: _LimitedAdapter, active: asyncio.Semaphore,
+                           report: SchedulerReport):
+        async with active:
+            if session.history is None:
+                session.history = MessageHistory(SYSTEM_PROMPT, token_budget=self.history_budget)
+            try:
+                for user_text in session.user_turns:
+                    remaining = self.max_steps_per_session - session.steps_used
+                    if remaining <= 0:
+                        session.step_limited = True
+                        break
+                    latencies: List[float] = []
+                    result = await run_agent_async(
+                        session.state, user_text, model,
+                        max_steps=remaining, history=session.history, tools=self.tools,
+                        tool_timeout=self.tool_timeout, verbose=self.verbose, step_latencies=latencies,
+                        stream=self.stream, tracer=self.tracer,
+                    )
+                    session.steps_used += len(latencies)
+                    report.step_latencies.extend(latencies)
+                    session.results.append(result)
+                    if result["step_limit"]:
+                        session.step_limited = True
+                        break
+                    if self.verbose:
+                        print(f"[{session.session_id}] {result.get('response')}")
+            except Exception as e:
+                # One broken session must not take the others down
+                session.error = f"{type(e).__name__}: {e}"
+
+    async def run(self, sessions: Iterable[Session]) -> SchedulerReport:
+        sessions = list(sessions)
+        report = SchedulerReport(sessions=len(sessions))
+        model = _LimitedAdapter(self.adapter, self.max_concurrent_model_calls, report)
+        active = asyncio.Semaphore(self.max_active_sessions)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(self._run_session(s, model, active, report) for s in sessions))
+        report.elapsed_seconds = time.perf_counter() - start
+
+        for session in sessions:
+            report.steps += session.steps_used
+            if session.error:
+                report.failed += 1
+            elif session.step_limited:
+                report.step_limited += 1
+            else:
+                report.completed += 1
+        return report
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+
+class Tracer:
+    """
+    Collects timing spans of the agent loop (step, model, parse, repair, tools, tool:<name>).
+
+    export_chrome_trace() writes the Chrome trace-event format, which opens in
+    chrome://tracing or https://ui.perfetto.dev; spans of tools running in worker
+    threads show up on their own rows. A disabled tracer records nothing.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.events: List[Dict[str, Any]] = []
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **args: Any) -> Iterator[Dict[str, Any]]:
+        """Times the block; the yielded dict can be filled with extra args while it runs."""
+        if not self.enabled:
+            yield args
+            return
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            end = time.perf_counter()
+            event = {
+                "name": name,
+                "cat": "agent",
+                "ph": "X",
+                "ts": (start - self._origin) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": args,
+            }
+            with self._lock:
+                self.events.append(event)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per span name: count, total and mean duration in ms."""
+        totals: Dict[str, Dict[str, float]] = {}
+        for event in self.events:
+            entry = totals.setdefault(event["name"], {"count": 0, "total_ms": 0.0})
+            entry["count"] += 1
+            entry["total_ms"] += event["dur"] / 1000
+        for entry in totals.values():
+            entry["mean_ms"] = entry["total_ms"] / entry["count"]
+        return totals
+
+    def export_chrome_trace(self, path: str) -> None:
+        with self._lock:
+            events = list(self.events)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+# Shared no-op tracer for callers that did not ask for tracing
+NULL_TRACER = Tracer(enabled=False)